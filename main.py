@@ -5,10 +5,13 @@ import pygame_gui
 import subprocess
 import sys
 import threading
+import queue
 import json
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from estimate import LAYOUT_BUDGET, count_text, duration_text, estimate_graph
 
 pygame.init()
-WINDOW_SIZE = (400, 227)
+WINDOW_SIZE = (400, 460)
 screen = pygame.display.set_mode(WINDOW_SIZE)
 pygame.display.set_caption('edo graphs v0.2')
 pygame.display.set_icon(pygame.image.load('src/assets/icon2.png'))
@@ -22,6 +25,7 @@ BUTTON_HOVER_COLOR = (70, 70, 70)
 BUTTON_SELECTED_COLOR = (0, 100, 200)
 BUTTON_OUTLINE_COLOR = (80, 80, 80)
 BUTTON_OUTLINE_SELECTED_COLOR = (0, 150, 255)
+ERROR_COLOR = (255, 110, 110)
 
 DEFAULT_SETTINGS = {
     'EDO': 12,
@@ -36,12 +40,18 @@ DEFAULT_SETTINGS = {
     'EXCLUSIONS': '',
     'INCLUDE_AND': True,
     'EXCLUDE_AND': False,
+    'ADD_REMOVE_NOTES': False,
+    'FLIP_CHORDS': False,
+    'COMPLEMENT_CHORDS': False,
+    'REMOVE_REFLECTIONS': False,
+    'REMOVE_COMPLEMENTS': False,
+    'SCALES': False,
 }
 
 def load_settings():
     if os.path.exists('src/settings.json'):
         with open('src/settings.json', 'r') as f:
-            settings = json.load(f)
+            settings = {**DEFAULT_SETTINGS, **json.load(f)}
             # remove trailing comma from INCLUSIONS and EXCLUSIONS
             for key in ['INCLUSIONS', 'EXCLUSIONS']:
                 if isinstance(settings.get(key), str) and settings[key].endswith(','):
@@ -55,7 +65,26 @@ def save_settings(settings):
 
 current_settings = load_settings()
 
-font = pygame.font.Font('src/assets/JetBrainsMono-Light.otf', 14)
+font = pygame.font.Font('src/assets/JetBrainsMono-Regular.otf', 14)
+
+def chord_size_text(chord_size):
+    # a [smallest, largest] range is shown as "3-5"
+    if isinstance(chord_size, list):
+        return f'{chord_size[0]}-{chord_size[1]}'
+    return str(chord_size)
+
+def parse_chord_size(text):
+    if '-' in text:
+        smallest, largest = (int(t) for t in text.split('-'))
+        return [min(smallest, largest), max(smallest, largest)]
+    return int(text)
+
+def scales_text(scales):
+    return ', '.join(scales) if scales else ''
+
+def parse_scales_text(text):
+    scales = [scale.strip().strip('\'"') for scale in text.split(',')]
+    return [scale for scale in scales if scale] or False
 
 def create_label_entry(x, y, label_width, entry_width, label_text, key):
     entry = pygame_gui.elements.UITextEntryLine(relative_rect=pygame.Rect((x+label_width+5, y), (entry_width, 25)),
@@ -65,7 +94,10 @@ def create_label_entry(x, y, label_width, entry_width, label_text, key):
             entry.set_text(','.join(map(str, current_settings[key])))
         except:
             entry.set_text(str(current_settings[key]))
-
+    elif key == 'CHORD_SIZE':
+        entry.set_text(chord_size_text(current_settings[key]))
+    elif key == 'SCALES':
+        entry.set_text(scales_text(current_settings[key]))
     else:
         entry.set_text(str(current_settings[key]))
     return entry
@@ -106,6 +138,7 @@ iterations_entry = create_label_entry(ENTRY_X+200, 35, 0, 72, 'iterations', 'ITE
 intervals_entry = create_label_entry(ENTRY_X, 65, 0, 272, 'intervals', 'INTERVALS')
 inclusions_entry = create_label_entry(ENTRY_X, 95, 0, 222, 'include', 'INCLUSIONS')
 exclusions_entry = create_label_entry(ENTRY_X, 125, 0, 222, 'exclude', 'EXCLUSIONS')
+scales_entry = create_label_entry(ENTRY_X, 155, 0, 272, 'scales', 'SCALES')
 
 class Button:
     def __init__(self, rect, text, key, always_white=False, toggle_text=None):
@@ -131,35 +164,165 @@ class Button:
         text = self.text if not self.toggle_text or self.is_selected else self.toggle_text
         render_button(surface, text, self.rect, self.is_selected, self.is_hovered, self.always_white)
 
-do_all_keys = Button((20, 160, 105, 25), 'do all keys', 'DO_ALL_KEYS')
-truncate_symbols = Button((210, 160, 80, 25), 'truncate', 'TRUNCATE_SYMBOLS')
-simplify_symbols = Button((300, 160, 80, 25), 'omit ".0"', 'SIMPLIFY_SYMBOLS')
+do_all_keys = Button((20, 190, 105, 25), 'do all keys', 'DO_ALL_KEYS')
+truncate_symbols = Button((210, 190, 80, 25), 'truncate', 'TRUNCATE_SYMBOLS')
+simplify_symbols = Button((300, 190, 80, 25), 'omit ".0"', 'SIMPLIFY_SYMBOLS')
 include_and = Button((340, 95, 40, 25), 'AND', 'INCLUDE_AND', toggle_text='OR')
 exclude_and = Button((340, 125, 40, 25), 'AND', 'EXCLUDE_AND', toggle_text='OR')
+add_remove_notes = Button((20, 220, 105, 25), 'add/remove', 'ADD_REMOVE_NOTES')
+flip_chords = Button((210, 220, 60, 25), 'flip', 'FLIP_CHORDS')
+complement_chords = Button((280, 220, 100, 25), 'complement', 'COMPLEMENT_CHORDS')
+remove_reflections = Button((20, 250, 175, 25), 'no reflections', 'REMOVE_REFLECTIONS')
+remove_complements = Button((205, 250, 175, 25), 'no complements', 'REMOVE_COMPLEMENTS')
 
-run_button = Button((20, 195, 70, 25), 'run', 'RUN', always_white=True)
-reset_button = Button((310, 195, 70, 25), 'reset', 'RESET', always_white=True)
+run_button = Button((20, 285, 70, 25), 'run', 'RUN', always_white=True)
+reset_button = Button((310, 285, 70, 25), 'reset', 'RESET', always_white=True)
 
-buttons = [do_all_keys, truncate_symbols, simplify_symbols, include_and, exclude_and, run_button, reset_button]
+buttons = [do_all_keys, truncate_symbols, simplify_symbols, include_and, exclude_and, add_remove_notes,
+           flip_chords, complement_chords, remove_reflections, remove_complements, run_button, reset_button]
 
 def update_ui_with_settings():
     edo_entry.set_text(str(current_settings['EDO']))
-    chord_size_entry.set_text(str(current_settings['CHORD_SIZE']))
+    chord_size_entry.set_text(chord_size_text(current_settings['CHORD_SIZE']))
     intervals_entry.set_text(','.join(map(str, current_settings['INTERVALS'])))
     dimensions_entry.set_text(str(current_settings['DIMENSIONS']))
     iterations_entry.set_text(str(current_settings['ITERATIONS']))
     
     inclusions_entry.set_text(str(current_settings['INCLUSIONS']))
     exclusions_entry.set_text(str(current_settings['EXCLUSIONS']))
+    scales_entry.set_text(scales_text(current_settings['SCALES']))
     
     for button in buttons:
         if button.key in current_settings:
             button.is_selected = current_settings[button.key]
 
+# the worker and the viewer send json lines on stdout (src/progress.py), both are read into one queue
+PROGRESS_ENV = {**os.environ, 'EDO_GRAPHS_PROGRESS': 'json'}
+messages = queue.Queue()
+
+def child_env(name):
+    # with EDO_GRAPHS_TRACE set (src/tracing.py), each process writes its own trace next to that path
+    env = dict(PROGRESS_ENV)
+    if env.get('EDO_GRAPHS_TRACE'):
+        root, ext = os.path.splitext(os.path.abspath(env['EDO_GRAPHS_TRACE']))
+        env['EDO_GRAPHS_TRACE'] = f'{root}.{name}{ext or ".json"}'
+    return env
+
+def watch(process, source):
+    def read():
+        for line in process.stdout:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                message = {'text': line.rstrip()}
+            messages.put((source, message))
+        process.stdout.close()
+    threading.Thread(target=read, daemon=True).start()
+
+class Worker:
+    # one long lived generator process (src/worker.py) with numpy and the generator already imported.
+    # jobs go to it one json line at a time, a new job kills a running one since its settings are stale
+    def __init__(self):
+        self.latest = 0
+        self.running = False
+        self.start()
+
+    def start(self):
+        self.process = subprocess.Popen([sys.executable, '-u', 'src/worker.py'], stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE, text=True, bufsize=1, env=child_env('worker'))
+        watch(self.process, 'worker')
+
+    def submit(self, settings_file, output):
+        if self.running:
+            self.cancel()
+        elif self.process.poll() is not None:
+            # it died since the last job (killed, out of memory), jobs would only hit a broken pipe
+            self.start()
+        self.latest += 1
+        self.running = True
+        job = json.dumps({'id': self.latest, 'settings': settings_file, 'output': output}) + '\n'
+        try:
+            self.process.stdin.write(job)
+            self.process.stdin.flush()
+        except BrokenPipeError:
+            # it died between the check and the write
+            self.start()
+            self.process.stdin.write(job)
+            self.process.stdin.flush()
+
+    def exit_code(self):
+        # the exit code when the process died during a job, None while it is alive or idle
+        return self.process.poll() if self.running else None
+
+    def cancel(self):
+        # the replacement starts importing right away, the next job waits in its stdin meanwhile
+        self.process.kill()
+        self.process.wait()
+        self.running = False
+        self.start()
+
+    def close(self):
+        self.process.kill()
+
+worker = Worker()
+viewer = None
+status_text = ''
+error_text = ''
+# stage name -> latest event, in the order the stages started
+stages = {}
+
+def close_viewer():
+    # the previous viewer shows a stale graph, it is closed before a new one opens
+    if viewer is not None and viewer.poll() is None:
+        viewer.terminate()
+        try:
+            viewer.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            viewer.kill()
+            viewer.wait()
+
+def open_viewer(message):
+    global viewer, status_text
+    status_text = f"{message['vertices']} chords, {message['arcs']} arcs"
+    close_viewer()
+    viewer = subprocess.Popen([sys.executable, '-u', 'display_net.py'], cwd='src', stdout=subprocess.PIPE,
+                              text=True, env=child_env('viewer'))
+    watch(viewer, viewer.pid)
+
+def handle_messages():
+    global status_text, error_text
+    code = worker.exit_code()
+    if code is not None and messages.empty():
+        # a worker that dies mid job never replies, the next submit starts a new one
+        worker.running = False
+        status_text = 'error'
+        error_text = f'the generator stopped unexpectedly (exit code {code})'
+    while not messages.empty():
+        source, message = messages.get()
+        # anything from a cancelled job or an older viewer is dropped
+        if source == 'worker' and message.get('id', worker.latest) != worker.latest:
+            continue
+        if source != 'worker' and (viewer is None or source != viewer.pid):
+            continue
+        if 'text' in message:
+            print(message['text'])
+            if message['text'].startswith('error'):
+                error_text = message['text']
+        elif 'event' in message:
+            stages[message['stage']] = message
+        elif message.get('status') == 'error':
+            worker.running = False
+            status_text = 'error'
+            error_text = message['error']
+        elif message.get('status') in ('done', 'cached'):
+            worker.running = False
+            open_viewer(message)
+
 def run_program():
+    global status_text, error_text
     try:
         edo = int(edo_entry.get_text())
-        chord_size = int(chord_size_entry.get_text())
+        chord_size = parse_chord_size(chord_size_entry.get_text())
         intervals = [int(i.strip()) for i in intervals_entry.get_text().split(',') if i.strip()]
         dimensions = int(dimensions_entry.get_text())
         do_all_keys2 = do_all_keys.is_selected
@@ -192,10 +355,17 @@ def run_program():
 
         current_settings['INCLUDE_AND'] = include_and.is_selected
         current_settings['EXCLUDE_AND'] = exclude_and.is_selected
-        current_settings['TITLE'] = f'"  {edo}e{chord_size}   \
-            {str(intervals)[1:-1].replace(" ","")}   \
-            i:{str(inclusions).replace("'","") if inclusions else ''}   \
-            e:{str(exclusions).replace("'","") if exclusions else ''}"'
+        current_settings['ADD_REMOVE_NOTES'] = add_remove_notes.is_selected
+        current_settings['FLIP_CHORDS'] = flip_chords.is_selected
+        current_settings['COMPLEMENT_CHORDS'] = complement_chords.is_selected
+        current_settings['REMOVE_REFLECTIONS'] = remove_reflections.is_selected
+        current_settings['REMOVE_COMPLEMENTS'] = remove_complements.is_selected
+        current_settings['SCALES'] = parse_scales_text(scales_entry.get_text())
+        intervals_title = str(intervals)[1:-1].replace(' ', '')
+        inclusions_title = inclusions.replace("'", '') if inclusions else ''
+        exclusions_title = exclusions.replace("'", '') if exclusions else ''
+        current_settings['TITLE'] = (f'"  {edo}e{chord_size_text(chord_size)}   {intervals_title}   '
+                                     f'i:{inclusions_title}   e:{exclusions_title}"')
         
         save_settings(current_settings)
         
@@ -203,11 +373,64 @@ def run_program():
             for key, value in current_settings.items():
                 f.write(f"{key} = {value}\n")
         
-        subprocess.run([sys.executable, 'src/edo_graphs.py'])
+        stages.clear()
+        error_text = ''
+        worker.submit('src/temp_settings.py', 'src/graph.net')
+        status_text = 'generating...'
     except ValueError as e:
-        print(f"error in input: {e}")
+        status_text = 'error in input'
+        error_text = str(e)
     except Exception as e:
-        print(f"an error occurred: {e}")
+        status_text = 'error'
+        error_text = str(e)
+
+estimates = {}
+
+def estimate_text():
+    # closed form sizes and layout time for what is typed in right now, (text, over budget)
+    try:
+        edo = int(edo_entry.get_text())
+        chord_size = parse_chord_size(chord_size_entry.get_text())
+        intervals = [int(i.strip()) for i in intervals_entry.get_text().split(',') if i.strip()]
+        iterations = int(iterations_entry.get_text())
+    except ValueError:
+        return '', False
+    if edo < 1 or edo > 1000:
+        return '', False
+    chord_sizes = chord_size if isinstance(chord_size, list) else (chord_size, chord_size)
+    key = (edo, tuple(chord_sizes), tuple(intervals), do_all_keys.is_selected, iterations,
+           add_remove_notes.is_selected, flip_chords.is_selected, complement_chords.is_selected)
+    if key not in estimates:
+        chords, arcs, seconds = estimate_graph(edo, *key[1:])
+        estimates[key] = (f'{count_text(chords)} chords, {duration_text(seconds)}', seconds > LAYOUT_BUDGET)
+    return estimates[key]
+
+def render_progress(surface, x, y, width):
+    # a bar for the stage running now and one line per stage with its time so far
+    if error_text:
+        for i in range(0, min(len(error_text), 44*6), 44):
+            line = font.render(error_text[i:i+44], True, ERROR_COLOR)
+            surface.blit(line, (x, y + 18 + 16*(i // 44)))
+        return
+    if not stages:
+        return
+    current = list(stages.values())[-1]
+    fraction = 1 if current['event'] == 'end' else (current['done'] or 0) / (current['total'] or 1)
+    pygame.draw.rect(surface, BUTTON_COLOR, (x, y, width, 12))
+    pygame.draw.rect(surface, BUTTON_SELECTED_COLOR, (x, y, round(width * min(fraction, 1)), 12))
+    pygame.draw.rect(surface, BUTTON_OUTLINE_COLOR, (x, y, width, 12), 1)
+    for i, event in enumerate(list(stages.values())[-6:]):
+        text = f"{event['stage']:<12}{event.get('elapsed') or 0:7.2f}s"
+        if event['event'] != 'end' and event.get('total'):
+            text += f"  {event['done']}/{event['total']}"
+            if event.get('eta') is not None:
+                text += f"  eta {event['eta']:.0f}s"
+        line = font.render(text, True, LIGHT_GRAY)
+        surface.blit(line, (x, y + 18 + 16*i))
+
+def render_status(surface, text, x, y, color=LIGHT_GRAY):
+    status_surface = font.render(text[:24], True, color)
+    surface.blit(status_surface, status_surface.get_rect(left=x, centery=y+12))
 
 clock = pygame.time.Clock()
 is_running = True
@@ -221,13 +444,15 @@ while is_running:
         for button in buttons:
             if button.handle_event(event):
                 if button == run_button:
-                    threading.Thread(target=run_program, daemon=True).start()
+                    run_program()
                 elif button == reset_button:
                     current_settings = DEFAULT_SETTINGS.copy()
                     update_ui_with_settings()
 
         manager.process_events(event)
 
+    handle_messages()
+
     manager.update(time_delta)
 
     screen.fill(BACKGROUND_COLOR)
@@ -240,11 +465,17 @@ while is_running:
     render_label(screen, 'intervals', LABEL_X, LABEL_Y+65)
     render_label(screen, 'include', LABEL_X, LABEL_Y+95)
     render_label(screen, 'exclude', LABEL_X, LABEL_Y+125)
+    render_label(screen, 'scales', LABEL_X, LABEL_Y+155)
 
     for button in buttons:
         button.draw(screen)
+    estimate, over_budget = estimate_text()
+    render_status(screen, estimate, 100, 285, ERROR_COLOR if over_budget else LIGHT_GRAY)
+    render_status(screen, status_text, 20, 315)
+    render_progress(screen, 20, 340, 360)
 
     pygame.display.update()
 
+worker.close()
 pygame.quit()
 sys.exit()
\ No newline at end of file
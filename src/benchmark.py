@@ -0,0 +1,161 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = 'hide'
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import numpy as np
+import pygame
+from edo_graphs import generate_transformations, interval_neighbors, unique_binaries, write_net_file
+from display_net import (SEB, ComponentView, apply_spring_layout_nd, draw_graph, find_components, get_hue_colors,
+                         normalize_positions, read_net_file, FONT_PATH, WINDOW_SIZE)
+from camera import Camera
+
+# times every stage from generation to drawing over a fixed grid of settings, so a change can be
+# checked against a saved run:
+#   python benchmark.py -o before.json
+#   python benchmark.py --compare before.json
+# the layout only runs a few iterations on the largest component, it costs the same every iteration.
+
+CASES = [
+    {'EDO': 12, 'CHORD_SIZE': 3, 'INTERVALS': [1], 'DO_ALL_KEYS': False},
+    {'EDO': 12, 'CHORD_SIZE': 3, 'INTERVALS': [1, 2], 'DO_ALL_KEYS': True},
+    {'EDO': 12, 'CHORD_SIZE': 4, 'INTERVALS': [1], 'DO_ALL_KEYS': True},
+    {'EDO': 19, 'CHORD_SIZE': 4, 'INTERVALS': [1, 2], 'DO_ALL_KEYS': False},
+    {'EDO': 24, 'CHORD_SIZE': 3, 'INTERVALS': [1, 5], 'DO_ALL_KEYS': False},
+]
+
+# a stage is a regression when it is this many times slower than the baseline, and slower by at
+# least MIN_SECONDS so that timer noise on tiny stages doesn't count
+THRESHOLD = 1.2
+MIN_SECONDS = 0.005
+
+def case_name(case):
+    intervals = ','.join(str(i) for i in case['INTERVALS'])
+    keys = 'all' if case['DO_ALL_KEYS'] else 'reduced'
+    return f"{case['EDO']}edo-{case['CHORD_SIZE']}-[{intervals}]-{keys}"
+
+def measure(function, repeat):
+    # best time of repeat runs, then one more run under tracemalloc for the peak memory. returns
+    # (seconds, peak bytes, result)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, result
+
+def run_case(case, repeat, iterations, frames, font, directory):
+    edo, size, intervals, all_keys = case['EDO'], case['CHORD_SIZE'], case['INTERVALS'], case['DO_ALL_KEYS']
+    path = os.path.join(directory, case_name(case) + '.net')
+    stages = {}
+
+    def stage(name, function, times=repeat):
+        seconds, peak, result = measure(function, times)
+        stages[name] = {'seconds': seconds, 'peak_bytes': peak}
+        return result
+
+    binaries = stage('unique_binaries', lambda: unique_binaries(edo, size))
+    stage('interval_neighbors', lambda: [interval_neighbors(b, intervals, not all_keys) for b in binaries])
+    labels, arcs = stage('generate_transformations',
+                         lambda: generate_transformations(edo, size, intervals, all_keys, False, False, True, False,
+                                                          True, True))
+    stage('write_net_file', lambda: write_net_file(path, labels, arcs, edo))
+    G = stage('read_net_file', lambda: read_net_file(path))
+    sg = find_components(G)[0]
+    raw = stage('layout', lambda: apply_spring_layout_nd(sg, iterations), 1)
+    stage('seb', lambda: SEB(raw).compute())
+    positions = normalize_positions(raw, 10)
+
+    view = ComponentView(sg, positions, font, get_hue_colors(edo, 145))
+    camera = Camera((WINDOW_SIZE/2, WINDOW_SIZE/2, WINDOW_SIZE/2))
+    screen = pygame.display.set_mode((WINDOW_SIZE, WINDOW_SIZE))
+    def draw():
+        for _ in range(frames):
+            camera.rotate(0.01, 0.02, 0)
+            draw_graph(screen, view, camera)
+    stage('draw_graph', draw)
+    stages['draw_graph']['seconds'] /= frames
+
+    return {'case': case_name(case), 'settings': case, 'vertices': len(labels), 'arcs': len(arcs),
+            'layout_nodes': sg.number_of_nodes(), 'stages': stages}
+
+def compare(results, baseline, threshold=THRESHOLD):
+    # [(case, stage, baseline seconds, seconds)] for every stage that got slower
+    before = {r['case']: r['stages'] for r in baseline['results']}
+    regressions = []
+    for result in results:
+        for name, stage in result['stages'].items():
+            old = before.get(result['case'], {}).get(name)
+            if old is None:
+                continue
+            if stage['seconds'] > old['seconds'] * threshold and stage['seconds'] - old['seconds'] > MIN_SECONDS:
+                regressions.append((result['case'], name, old['seconds'], stage['seconds']))
+    return regressions
+
+def print_results(results, baseline=None):
+    before = {r['case']: r['stages'] for r in baseline['results']} if baseline else {}
+    for result in results:
+        print(f"{result['case']}: {result['vertices']} chords, {result['arcs']} arcs")
+        for name, stage in result['stages'].items():
+            line = f"  {name:<26}{stage['seconds']*1000:>10.2f} ms {stage['peak_bytes']/2**20:>9.2f} MiB"
+            old = before.get(result['case'], {}).get(name)
+            if old:
+                line += f"  {stage['seconds']/old['seconds']:>6.2f}x"
+            print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description='time every stage of generating and drawing a graph')
+    parser.add_argument('-o', '--output', help='write the results to this json file')
+    parser.add_argument('--compare', metavar='JSON', help='report stages slower than these saved results')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    parser.add_argument('-r', '--repeat', type=int, default=3)
+    parser.add_argument('-i', '--iterations', type=int, default=3, help='layout iterations')
+    parser.add_argument('-f', '--frames', type=int, default=20, help='frames drawn per case')
+    parser.add_argument('-c', '--case', action='append', help='only run cases with this name')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.compare, 'r') as file:
+                baseline = json.load(file)
+        except (OSError, ValueError) as e:
+            print(f'error: could not read {args.compare}: {e}')
+            sys.exit(1)
+
+    cases = [c for c in CASES if not args.case or case_name(c) in args.case]
+    if not cases:
+        print(f'error: no cases named {", ".join(args.case)}, the cases are {", ".join(map(case_name, CASES))}')
+        sys.exit(1)
+
+    pygame.init()
+    font = pygame.font.Font(FONT_PATH, 12)
+    with tempfile.TemporaryDirectory() as directory:
+        results = [run_case(case, args.repeat, args.iterations, args.frames, font, directory) for case in cases]
+    pygame.quit()
+
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'python': platform.python_version(), 'numpy': np.__version__, 'iterations': args.iterations,
+                       'results': results}, file, indent=2)
+
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        for case, name, old, new in regressions:
+            print(f'regression: {case} {name} {old*1000:.2f} ms -> {new*1000:.2f} ms')
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
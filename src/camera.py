@@ -0,0 +1,65 @@
+import math
+import numpy as np
+
+# re-orthonormalize the accumulated matrix every this many updates to stop drift
+ORTHONORMALIZE_EVERY = 500
+
+class Camera:
+    def __init__(self, center):
+        self.center = np.asarray(center, dtype=float)
+        self.matrix = np.eye(3)
+        self.angular_velocity = np.zeros(3)
+        self._delta = np.eye(3)
+        self._product = np.empty((3, 3))
+        self._matrix_t = self.matrix.T
+        self._shifted = np.empty((0, 3))
+        self._projected = np.empty((0, 3))
+        self._updates = 0
+
+    def reset(self):
+        self.matrix[...] = np.eye(3)
+        self.angular_velocity[:] = 0
+        self._updates = 0
+
+    def rotate(self, x, y, z):
+        # composes the rotation with rotation vector (x, y, z) on the left, like rot_delta * rotation_quat
+        angle = math.sqrt(x*x + y*y + z*z)
+        if angle == 0:
+            return
+        x /= angle
+        y /= angle
+        z /= angle
+        c = math.cos(angle)
+        s = math.sin(angle)
+        t = 1 - c
+        d = self._delta
+        d[0, 0] = t*x*x + c
+        d[0, 1] = t*x*y - s*z
+        d[0, 2] = t*x*z + s*y
+        d[1, 0] = t*x*y + s*z
+        d[1, 1] = t*y*y + c
+        d[1, 2] = t*y*z - s*x
+        d[2, 0] = t*x*z - s*y
+        d[2, 1] = t*y*z + s*x
+        d[2, 2] = t*z*z + c
+        np.matmul(d, self.matrix, out=self._product)
+        self.matrix[...] = self._product
+
+        self._updates += 1
+        if self._updates % ORTHONORMALIZE_EVERY == 0:
+            u, _, vt = np.linalg.svd(self.matrix)
+            self.matrix[...] = u @ vt
+
+    def update(self, damping):
+        v = self.angular_velocity
+        self.rotate(v[0], v[1], v[2])
+        v *= damping
+
+    def project(self, positions):
+        if self._projected.shape != positions.shape:
+            self._shifted = np.empty_like(positions, dtype=float)
+            self._projected = np.empty_like(positions, dtype=float)
+        np.subtract(positions, self.center, out=self._shifted)
+        np.matmul(self._shifted, self._matrix_t, out=self._projected)
+        self._projected += self.center
+        return self._projected
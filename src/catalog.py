@@ -0,0 +1,265 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import numpy as np
+import networkx as nx
+from scipy.sparse.linalg import eigsh
+import layout_cache
+import fingerprint
+from edo_graphs import read_net_arcs
+
+DEFAULT_DB = 'catalog.db'
+# exact diameter is one BFS per node, so it is skipped on larger components
+DIAMETER_MAX_NODES = 3000
+DENSE_SPECTRUM_MAX_NODES = 400
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS graphs (
+    id TEXT PRIMARY KEY,
+    edo INTEGER NOT NULL,
+    chord_size INTEGER NOT NULL,
+    intervals TEXT NOT NULL,
+    do_all_keys INTEGER NOT NULL,
+    inclusions TEXT,
+    exclusions TEXT,
+    include_and INTEGER,
+    exclude_and INTEGER,
+    config TEXT NOT NULL,
+    vertices INTEGER NOT NULL,
+    edges INTEGER NOT NULL,
+    components INTEGER NOT NULL,
+    largest_component INTEGER NOT NULL,
+    diameter INTEGER,
+    spectral_radius REAL,
+    spectral_gap REAL,
+    degree_histogram TEXT,
+    graph_file TEXT,
+    layout_key TEXT
+);
+CREATE TABLE IF NOT EXISTS components (
+    graph_id TEXT NOT NULL REFERENCES graphs (id) ON DELETE CASCADE,
+    rank INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (graph_id, rank)
+);
+CREATE INDEX IF NOT EXISTS graphs_edo ON graphs (edo, chord_size);
+CREATE INDEX IF NOT EXISTS graphs_components ON graphs (edo, components, largest_component);
+CREATE INDEX IF NOT EXISTS graphs_size ON graphs (vertices, edges);
+CREATE INDEX IF NOT EXISTS components_size ON components (size, graph_id);
+CREATE TABLE IF NOT EXISTS fingerprints (
+    graph_id TEXT PRIMARY KEY REFERENCES graphs (id) ON DELETE CASCADE,
+    wl_hash TEXT NOT NULL,
+    vertices INTEGER NOT NULL,
+    edges INTEGER NOT NULL,
+    max_degree INTEGER NOT NULL,
+    degree_profile TEXT NOT NULL,
+    size_profile TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fingerprints_hash ON fingerprints (wl_hash);
+CREATE INDEX IF NOT EXISTS fingerprints_candidates ON fingerprints (vertices, edges, max_degree);
+'''
+
+def spectral_summary(G):
+    # largest two adjacency eigenvalues of the undirected graph
+    n = G.number_of_nodes()
+    if n < 2:
+        return None, None
+    A = nx.to_scipy_sparse_array(G, dtype=float, format='csr')
+    if n <= DENSE_SPECTRUM_MAX_NODES:
+        eigenvalues = np.linalg.eigvalsh(A.toarray())[::-1][:2]
+    else:
+        eigenvalues = np.sort(eigsh(A, k=2, which='LA', return_eigenvectors=False))[::-1]
+    return float(eigenvalues[0]), float(eigenvalues[0] - eigenvalues[1])
+
+def graph_invariants(labels, arcs, dimensions=3, iterations=500, seed=0):
+    G = nx.Graph()
+    G.add_nodes_from(labels)
+    G.add_edges_from(arcs)
+    components = sorted(nx.connected_components(G), key=len, reverse=True)
+    largest = G.subgraph(components[0]) if components else G
+
+    diameter = None
+    if 0 < largest.number_of_nodes() <= DIAMETER_MAX_NODES:
+        diameter = nx.diameter(largest)
+    spectral_radius, spectral_gap = spectral_summary(G)
+
+    # the viewer shows the largest component first, so that is the layout worth pointing at
+    layout_key = None
+    if components and len(components[0]) >= 3:
+        largest_arcs = nx.DiGraph()
+        largest_arcs.add_nodes_from(components[0])
+        largest_arcs.add_edges_from(a for a in arcs if a[0] in components[0])
+        layout_key = layout_cache.graph_key(largest_arcs, dimensions, iterations, seed)
+
+    return {
+        'components': len(components),
+        'component_sizes': [len(c) for c in components],
+        'largest_component': len(components[0]) if components else 0,
+        'diameter': diameter,
+        'spectral_radius': spectral_radius,
+        'spectral_gap': spectral_gap,
+        'degree_histogram': nx.degree_histogram(G),
+        'layout_key': layout_key,
+    }
+
+def connect(path=DEFAULT_DB):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA foreign_keys = ON')
+    conn.executescript(SCHEMA)
+    return conn
+
+def filter_text(value):
+    return json.dumps(list(value)) if value else None
+
+def insert_record(conn, record, base_dir=''):
+    # takes one line of a sweep summary.jsonl
+    if 'error' in record:
+        return False
+    config = record['config']
+    conn.execute('INSERT OR REPLACE INTO graphs VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)', (
+        record['id'], config['EDO'], config['CHORD_SIZE'], json.dumps(config['INTERVALS']),
+        int(config['DO_ALL_KEYS']), filter_text(config['INCLUSIONS']), filter_text(config['EXCLUSIONS']),
+        int(config['INCLUDE_AND']), int(config['EXCLUDE_AND']), json.dumps(config, sort_keys=True),
+        record['vertices'], record['edges'], record['components'], record['largest_component'],
+        record['diameter'], record['spectral_radius'], record['spectral_gap'],
+        json.dumps(record['degree_histogram']), os.path.join(base_dir, record['graph_file']),
+        record['layout_key'],
+    ))
+    conn.execute('DELETE FROM components WHERE graph_id = ?', (record['id'],))
+    conn.executemany('INSERT INTO components VALUES (?,?,?)',
+                     [(record['id'], rank, size) for rank, size in enumerate(record['component_sizes'])])
+    if 'wl_hash' in record:
+        conn.execute('INSERT OR REPLACE INTO fingerprints VALUES (?,?,?,?,?,?,?)', (
+            record['id'], record['wl_hash'], record['vertices'], record['edges'], record['max_degree'],
+            json.dumps(record['degree_profile']), json.dumps(record['size_profile']),
+        ))
+    return True
+
+def find_isomorphic(conn, wl_hash):
+    return conn.execute('SELECT graphs.* FROM fingerprints JOIN graphs ON graphs.id = graph_id '
+                        'WHERE wl_hash = ? ORDER BY graphs.id', (wl_hash,)).fetchall()
+
+def duplicate_groups(conn):
+    return conn.execute('SELECT wl_hash, COUNT(*) AS count, MIN(vertices) AS vertices, MIN(edges) AS edges '
+                        'FROM fingerprints GROUP BY wl_hash HAVING count > 1 ORDER BY count DESC').fetchall()
+
+def containing_candidates(conn, prints):
+    # graphs that pass every necessary condition for containing the fingerprinted subgraph
+    rows = conn.execute('SELECT * FROM fingerprints WHERE vertices >= ? AND edges >= ? AND max_degree >= ?',
+                        (prints['vertices'], prints['edges'], prints['max_degree'])).fetchall()
+    candidates = []
+    for row in rows:
+        big = dict(row)
+        big['degree_profile'] = json.loads(row['degree_profile'])
+        big['size_profile'] = json.loads(row['size_profile'])
+        if fingerprint.may_contain(big, prints):
+            candidates.append(row['graph_id'])
+    return candidates
+
+def ingest(conn, sweep_dir):
+    count = 0
+    with open(os.path.join(sweep_dir, 'summary.jsonl'), 'r') as file, conn:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            count += insert_record(conn, record, sweep_dir)
+    return count
+
+QUERY_FILTERS = {
+    'edo': 'edo = ?',
+    'chord_size': 'chord_size = ?',
+    'do_all_keys': 'do_all_keys = ?',
+    'components': 'components = ?',
+    'min_largest': 'largest_component >= ?',
+    'max_largest': 'largest_component <= ?',
+    'min_vertices': 'vertices >= ?',
+    'max_vertices': 'vertices <= ?',
+    'min_edges': 'edges >= ?',
+    'max_edges': 'edges <= ?',
+    'max_diameter': 'diameter <= ?',
+}
+
+def query(conn, limit=None, **filters):
+    where = []
+    params = []
+    for key, value in filters.items():
+        if value is None:
+            continue
+        if key not in QUERY_FILTERS:
+            raise ValueError(f'unknown filter: {key}')
+        where.append(QUERY_FILTERS[key])
+        params.append(value)
+    sql = 'SELECT * FROM graphs'
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += ' ORDER BY edo, chord_size, vertices'
+    if limit:
+        sql += f' LIMIT {int(limit)}'
+    return conn.execute(sql, params).fetchall()
+
+def main():
+    parser = argparse.ArgumentParser(description='graph catalog')
+    parser.add_argument('--db', default=DEFAULT_DB)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = commands.add_parser('ingest', help='add the results of a sweep')
+    ingest_parser.add_argument('sweep_dirs', nargs='+')
+
+    query_parser = commands.add_parser('query', help='list graphs matching every given filter')
+    for key in QUERY_FILTERS:
+        query_parser.add_argument(f'--{key.replace("_", "-")}', dest=key, type=int)
+    query_parser.add_argument('--limit', type=int)
+
+    commands.add_parser('duplicates', help='list structures stored more than once')
+
+    contains_parser = commands.add_parser('contains', help='find graphs that may contain a subgraph')
+    contains_parser.add_argument('net_file')
+    contains_parser.add_argument('--verify', action='store_true', help='confirm each candidate with VF2')
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    if args.command == 'ingest':
+        for sweep_dir in args.sweep_dirs:
+            print(f'{sweep_dir}: {ingest(conn, sweep_dir)} graphs')
+        return
+
+    if args.command == 'duplicates':
+        for row in duplicate_groups(conn):
+            print(f'{row["wl_hash"]}  {row["count"]} graphs  {row["vertices"]} vertices  {row["edges"]} edges')
+        return
+
+    if args.command == 'contains':
+        labels, arcs, _ = read_net_arcs(args.net_file)
+        H = fingerprint.build_graph(labels, arcs)
+        prints = fingerprint.fingerprint(H)
+        prints.update(vertices=H.number_of_nodes(), edges=H.number_of_edges())
+        start = time.perf_counter()
+        candidates = containing_candidates(conn, prints)
+        print(f'{len(candidates)} candidates in {(time.perf_counter() - start)*1000:.1f} ms')
+        for graph_id in candidates:
+            graph_file = conn.execute('SELECT graph_file FROM graphs WHERE id = ?', (graph_id,)).fetchone()[0]
+            if args.verify:
+                G = fingerprint.build_graph(*read_net_arcs(graph_file)[:2])
+                if not fingerprint.contains_subgraph(G, H):
+                    continue
+            print(f'{graph_id}  {graph_file}')
+        return
+
+    filters = {key: getattr(args, key) for key in QUERY_FILTERS}
+    start = time.perf_counter()
+    rows = query(conn, args.limit, **filters)
+    elapsed = time.perf_counter() - start
+    for row in rows:
+        print(f'{row["id"]}  {row["edo"]}e{row["chord_size"]}  {",".join(map(str, json.loads(row["intervals"])))}  '
+              f'{row["vertices"]} vertices  {row["edges"]} edges  {row["components"]} components  '
+              f'largest {row["largest_component"]}  {row["graph_file"]}')
+    print(f'{len(rows)} graphs in {elapsed*1000:.1f} ms')
+
+if __name__ == '__main__':
+    main()
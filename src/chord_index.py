@@ -0,0 +1,53 @@
+import re
+import numpy as np
+from edo_graphs import parse_chord
+
+def canonical_mask(mask, edo):
+    full = (1 << edo) - 1
+    return min(((mask >> i) | (mask << (edo - i))) & full for i in range(edo))
+
+def parse_notes(text, edo):
+    # pitch classes separated by commas or spaces
+    notes = [int(n) for n in re.split(r'[,\s]+', text.strip()) if n]
+    if any(not 0 <= n < edo for n in notes):
+        raise ValueError(f'pitch classes go from 0 to {edo-1}')
+    return notes
+
+def parse_shapes(text, edo):
+    # chord symbols or binary strings separated by commas or spaces, any key picks the whole shape
+    return [canonical_mask(parse_chord(s, edo), edo) for s in re.split(r'[,\s]+', text.strip()) if s]
+
+class ChordIndex:
+    # built once per component from the labels. masks[i] has bit q set when node i contains pitch
+    # class q, and shape_ids[i] points into shape_masks, so every query is a few array operations
+    def __init__(self, labels, edo):
+        self.edo = edo
+        self.masks = np.array([parse_chord(str(label), edo) for label in labels], dtype=np.int64)
+        shapes, self.shape_ids = np.unique([str(label).partition('.')[0] for label in labels],
+                                           return_inverse=True)
+        self.shape_masks = np.array([canonical_mask(int(m), edo) for m in self.masks[
+            np.unique(self.shape_ids, return_index=True)[1]]], dtype=np.int64)
+        self.shape_names = shapes.tolist()
+
+    def __len__(self):
+        return len(self.masks)
+
+    def with_notes(self, notes, every=True):
+        bits = np.int64(sum(1 << n for n in set(notes)))
+        if every:
+            return (self.masks & bits) == bits
+        return (self.masks & bits) != 0
+
+    def with_shapes(self, shape_masks):
+        return np.isin(self.shape_ids, np.flatnonzero(np.isin(self.shape_masks, shape_masks)))
+
+    def select(self, notes=None, shapes=None):
+        # chords with all of the notes and one of the shapes, None when nothing is asked for
+        if not notes and not shapes:
+            return None
+        selected = np.ones(len(self), dtype=bool)
+        if notes:
+            selected &= self.with_notes(notes)
+        if shapes:
+            selected &= self.with_shapes(shapes)
+        return selected
@@ -0,0 +1,165 @@
+import sys
+import time
+import argparse
+from edo_graphs import binary_to_symbol, parse_chord
+
+class ChordGraph:
+    # the graph generate_transformations would build, without building it. chords are python int masks
+    # (bit q is pitch class q, so any edo works), and arcs are computed when a chord is visited.
+    # an arc moves one note by one of the intervals, from pitch q to q - offset, onto an empty pitch.
+    def __init__(self, edo, intervals, do_all_keys=True):
+        self.edo = edo
+        self.intervals = list(intervals)
+        self.do_all_keys = do_all_keys
+        self.full = (1 << edo) - 1
+        self.canonical_cache = {}
+
+    def canonical(self, mask):
+        if self.do_all_keys:
+            return mask
+        if mask not in self.canonical_cache:
+            edo = self.edo
+            self.canonical_cache[mask] = min(((mask >> i) | (mask << (edo - i))) & self.full for i in range(edo))
+        return self.canonical_cache[mask]
+
+    def notes(self, mask):
+        return [q for q in range(self.edo) if mask >> q & 1]
+
+    def neighbors(self, mask):
+        # yields (interval, chord) for every arc leaving the chord
+        for q in self.notes(mask):
+            for offset in self.intervals:
+                target = (q - offset) % self.edo
+                if not mask >> target & 1:
+                    yield offset, self.canonical(mask ^ (1 << q) ^ (1 << target))
+
+    def predecessors(self, mask):
+        # yields (interval, chord) for every arc arriving at the chord
+        for q in self.notes(mask):
+            for offset in self.intervals:
+                source = (q + offset) % self.edo
+                if not mask >> source & 1:
+                    yield offset, self.canonical(mask ^ (1 << q) ^ (1 << source))
+
+    def label(self, mask, simplify_symbol=False, truncate=True):
+        symbol = binary_to_symbol(''.join('1' if mask >> q & 1 else '0' for q in range(self.edo)),
+                                  self.edo, simplify_symbol)
+        if truncate:
+            chord, dot, key = symbol.partition('.')
+            symbol = chord[:-1] + dot + key
+        return symbol
+
+def expand(level, parents, distances, step):
+    # one full breadth first level. parents[chord] lists every (interval, chord) one level closer
+    # to where that side started, so every shortest path can be walked back
+    found = {}
+    for mask in level:
+        for offset, other in step(mask):
+            # shapes can be reached from the same shape by moving different notes the same interval
+            if other not in parents and (offset, mask) not in found.get(other, ()):
+                found.setdefault(other, []).append((offset, mask))
+    parents.update(found)
+    depth = distances[level[0]] + 1
+    distances.update((mask, depth) for mask in found)
+    return list(found)
+
+def meet(graph, start, goal, max_depth=None):
+    # bidirectional bfs. returns (distance, meeting chords, forward parents, backward parents), where
+    # every shortest path goes through exactly one meeting chord. distance is None if there is no path
+    start, goal = graph.canonical(start), graph.canonical(goal)
+    forward, backward = {start: []}, {goal: []}
+    forward_distances, backward_distances = {start: 0}, {goal: 0}
+    if start == goal:
+        return 0, [start], forward, backward
+    forward_level, backward_level = [start], [goal]
+    depth = 0
+    while forward_level and backward_level and (max_depth is None or depth < max_depth):
+        depth += 1
+        # always grow the smaller side, both sides together stay far smaller than one search
+        if len(forward_level) <= len(backward_level):
+            forward_level = expand(forward_level, forward, forward_distances, graph.neighbors)
+            meeting = [m for m in forward_level if m in backward]
+        else:
+            backward_level = expand(backward_level, backward, backward_distances, graph.predecessors)
+            meeting = [m for m in backward_level if m in forward]
+        if meeting:
+            # the meeting chords are all on the level just found, the shortest paths cross it
+            # at the ones closest to the other side
+            totals = {m: forward_distances[m] + backward_distances[m] for m in meeting}
+            distance = min(totals.values())
+            return distance, [m for m in meeting if totals[m] == distance], forward, backward
+    return None, [], forward, backward
+
+def sequences_to(parents, mask, memo):
+    # the distinct interval sequences from the root of parents to mask, each with one chord path
+    # that takes it. sequences are merged at every chord, so this never lists paths one by one
+    if mask not in memo:
+        if not parents[mask]:
+            memo[mask] = {(): [mask]}
+        else:
+            sequences = {}
+            for offset, other in parents[mask]:
+                for intervals, chords in sequences_to(parents, other, memo).items():
+                    sequences.setdefault(intervals + (offset,), chords + [mask])
+            memo[mask] = sequences
+    return memo[mask]
+
+def count_to(parents, mask, memo):
+    if mask not in memo:
+        memo[mask] = sum(count_to(parents, other, memo) for _, other in parents[mask]) or 1
+    return memo[mask]
+
+def interval_sequences(graph, start, goal, max_depth=None):
+    # returns (distance, sequences, paths): every distinct interval sequence along a shortest path,
+    # each with one chord path that takes it, and the number of shortest paths
+    distance, meeting, forward, backward = meet(graph, start, goal, max_depth)
+    sequences = {}
+    forward_memo, backward_memo = {}, {}
+    forward_counts, backward_counts = {}, {}
+    for mask in meeting:
+        heads = sequences_to(forward, mask, forward_memo)
+        # the backward side was searched from the goal, so its sequences read from the goal to mask
+        tails = sequences_to(backward, mask, backward_memo)
+        for head, head_chords in heads.items():
+            for tail, tail_chords in tails.items():
+                sequences.setdefault(head + tail[::-1], head_chords + tail_chords[-2::-1])
+    paths = sum(count_to(forward, m, forward_counts) * count_to(backward, m, backward_counts) for m in meeting)
+    return distance, sequences, paths
+
+def main():
+    parser = argparse.ArgumentParser(description='shortest interval sequences from one chord to another')
+    parser.add_argument('edo', type=int)
+    parser.add_argument('start', help='chord symbol or binary string')
+    parser.add_argument('goal', help='chord symbol or binary string')
+    parser.add_argument('-i', '--intervals', default='1')
+    parser.add_argument('-r', '--reduce', action='store_true', help='treat chords as shapes, without keys')
+    parser.add_argument('--limit', type=int, help='most interval sequences to print')
+    parser.add_argument('--max-depth', type=int)
+    parser.add_argument('--no-truncate', dest='truncate', action='store_false')
+    parser.add_argument('--simplify', action='store_true', help='omit ".0" from symbols')
+    args = parser.parse_args()
+
+    try:
+        start, goal = parse_chord(args.start, args.edo), parse_chord(args.goal, args.edo)
+    except ValueError as e:
+        print(f'error: {e}')
+        sys.exit(1)
+    if bin(start).count('1') != bin(goal).count('1'):
+        print(f'error: {args.start} and {args.goal} have different numbers of notes')
+        sys.exit(1)
+
+    graph = ChordGraph(args.edo, [int(i) for i in args.intervals.split(',')], not args.reduce)
+    elapsed = time.perf_counter()
+    distance, sequences, paths = interval_sequences(graph, start, goal, args.max_depth)
+    elapsed = time.perf_counter() - elapsed
+
+    if distance is None:
+        print(f'no path from {args.start} to {args.goal} ({elapsed*1000:.1f} ms)')
+        sys.exit(1)
+    for intervals, chords in list(sequences.items())[:args.limit]:
+        labels = ' -> '.join(graph.label(m, args.simplify, args.truncate) for m in chords)
+        print(f'{",".join(map(str, intervals)) or "-"}  {labels}')
+    print(f'distance {distance}, {paths} paths, {len(sequences)} interval sequences ({elapsed*1000:.1f} ms)')
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,24 @@
 import os
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = 'hide'
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from tqdm import tqdm
 from PIL import Image
 import pygame
 import numpy as np
 import math
+import time
 import networkx as nx
-from scipy.spatial.transform import Rotation
 from sklearn.decomposition import PCA
+from camera import Camera
+from hud import FrameTimes, draw_hud
+from chord_index import ChordIndex, parse_notes, parse_shapes
+from refilter import FilteredGraph, parse_filter
+from symmetry import find_symmetry
+import kernels
+import layout_cache
+import progress
+import tracing
 from temp_settings import *
 
 if DIMENSIONS <= 1:
@@ -23,10 +33,29 @@ BUTTON_SIZE = 16
 SENSITIVITY = 0.4
 DAMPING_FACTOR = 0.97
 
+LAYOUT_SEED = 0
+
+# level of detail: below this many screen pixels per node, labels become dots
+LOD_MIN_AREA = 1.0  # in units of one label's area
+DOT_SIZE = 3
+# most edges drawn per frame
+MAX_EDGES = 4000
+# a layout warm started from earlier positions runs this fraction of the iterations
+WARM_START_FRACTION = 0.25
+# prepare_graph saves a running layout to its checkpoint file this often
+CHECKPOINT_EVERY = 100
+# a positions file the viewer starts its layouts from and saves them to when it closes, see prepare.py
+POSITIONS_FILE = None
+# chords outside a highlight are drawn this many times darker
+HIGHLIGHT_DIM = 4
+# lay out graphs made in all keys with their transposition symmetry, see symmetry.py
+SYMMETRIC_LAYOUT = True
+
 WHITE = (255, 255, 255)
 GRAY = (100, 100, 100)
 DARK_GRAY = (50, 50, 50)
 BLACK = (0, 0, 0)
+EDGE_COLOR = (119, 119, 119)
 
 CHARACTERS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
 CHAR_TO_VALUE = {char: index for index, char in enumerate(CHARACTERS)}
@@ -34,7 +63,11 @@ CHAR_TO_VALUE = {char: index for index, char in enumerate(CHARACTERS)}
 def base62_to_int(b62_str):
     return sum(CHAR_TO_VALUE[char]*(62**i) for i, char in enumerate(reversed(b62_str)))
 
-HUE_WHEEL = Image.open('assets/hue_wheel.png')
+# assets live next to this file, so the viewer and the renderer work from any directory
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+FONT_PATH = os.path.join(ASSETS_DIR, 'JetBrainsMono-Regular.otf')
+
+HUE_WHEEL = Image.open(os.path.join(ASSETS_DIR, 'hue_wheel.png'))
 hue_width = HUE_WHEEL.size[0]
 
 def get_hue_colors(num_colors, offset=0):
@@ -49,44 +82,57 @@ def generate_label_colors(nodes, label_colors):
         for node in nodes
     ]
 
+@tracing.traced()
 def read_net_file(file_path):
     return nx.read_pajek(file_path)
 
-def apply_spring_layout_nd(G, iterations=300, k=None):
+@tracing.traced()
+def apply_spring_layout_nd(G, iterations=300, k=None, dimensions=DIMENSIONS, seed=LAYOUT_SEED,
+                           initial=None, temperature=0.1, edo=None, start=0, checkpoint=None):
+    # with edo, a component that transposes onto itself only gets forces for one chord per orbit.
+    # start skips that many iterations of the cooling schedule, to resume a layout from initial, and
+    # checkpoint(positions, done) is called every CHECKPOINT_EVERY iterations
     if k is None:
-        k = 1 / math.pow(len(G.nodes()), 1/DIMENSIONS)
-
-    pos = {node: np.random.rand(DIMENSIONS) for node in G.nodes()}
-    nodes = list(G.nodes())
-    t = 0.1
-    dt = t / float(iterations+1)
-
-    for _ in tqdm(range(iterations)):
-        disp = {node: np.zeros(DIMENSIONS) for node in G.nodes()}
-        for i, node1 in enumerate(nodes):
-            for node2 in nodes[i + 1:]:
-                delta = pos[node1] - pos[node2]
-                dist = np.linalg.norm(delta)
-                if dist != 0:
-                    factor = k * k / dist
-                    disp[node1] += delta/dist*factor
-                    disp[node2] -= delta/dist*factor
-
-        for edge in G.edges():
-            delta = pos[edge[0]] - pos[edge[1]]
-            dist = np.linalg.norm(delta)
-            if dist != 0:
-                factor = dist * dist / k
-                disp[edge[0]] -= delta/dist*factor
-                disp[edge[1]] += delta/dist*factor
-
-        for node in G.nodes():
-            dist = np.linalg.norm(disp[node])
-            if dist != 0:
-                pos[node] += disp[node]/dist*min(dist, t)
+        k = 1 / math.pow(len(G.nodes()), 1/dimensions)
+
+    # seeded and in label order, so the same graph always gets the same layout
+    # rows of pos are nodes in label order
+    rng = np.random.default_rng(seed)
+    nodes = sorted(G.nodes(), key=str)
+    index = {node: i for i, node in enumerate(nodes)}
+    edges = sorted(G.edges(), key=lambda e: (str(e[0]), str(e[1])))
+    src = np.array([index[a] for a, _ in edges], dtype=np.intp)
+    dst = np.array([index[b] for _, b in edges], dtype=np.intp)
+    order = np.array([index[node] for node in G.nodes()], dtype=np.intp)
+    if initial is None:
+        pos = np.array([rng.random(dimensions) for node in nodes])
+    else:
+        pos = np.empty((len(nodes), dimensions))
+        pos[order] = np.asarray(initial, dtype=float)
+    dt = temperature / float(iterations+1)
+    t = temperature - start * dt
+
+    symmetry = find_symmetry(nodes, src, dst, edo) if edo is not None else None
+    rows = None
+    if symmetry is not None:
+        rows = symmetry.rows
+        rotations = symmetry.rotations(dimensions)
+        symmetry.spread(pos, rotations)
+
+    # the launcher gets structured progress, a terminal gets a bar
+    laying_out = progress.Stage('layout', iterations - start)
+    for i in range(start, iterations) if progress.ENABLED else tqdm(range(start, iterations)):
+        kernels.spring_step(pos, src, dst, k, t, rows)
+        if symmetry is not None:
+            symmetry.spread(pos, rotations)
         t -= dt
+        laying_out.advance()
+        tracing.count('layout', iterations=laying_out.done)
+        if checkpoint is not None and (i + 1) % CHECKPOINT_EVERY == 0 and i + 1 < iterations:
+            checkpoint(pos[order], i + 1)
+    laying_out.finish()
 
-    return np.array([pos[node] for node in G.nodes()])
+    return pos[order]
 
 class SEB:
     def __init__(self, points):
@@ -97,15 +143,14 @@ class SEB:
         self.epsilon = 1e-10
         self.max_iterations = 1000
 
+    @tracing.traced('SEB.compute')
     def compute(self):
         self.center = (np.min(self.points, axis=0) + np.max(self.points, axis=0)) / 2
         self.radius = 0
         self.support_set = []
 
         for _ in range(self.max_iterations):
-            distances = np.linalg.norm(self.points - self.center, axis=1)
-            farthest_idx = np.argmax(distances)
-            farthest_distance = distances[farthest_idx]
+            farthest_idx, farthest_distance = kernels.farthest_point(self.points, self.center)
 
             if farthest_distance <= self.radius + self.epsilon:
                 break
@@ -147,16 +192,17 @@ class SEB:
             most_interior = interior_points[np.argmin(distances[interior_points])]
             self.support_set.pop(most_interior)
 
-def normalize_positions(positions, margin_size):
-    if DIMENSIONS == 2:
+@tracing.traced()
+def normalize_positions(positions, margin_size, dimensions=DIMENSIONS):
+    if dimensions == 2:
         pca = PCA(n_components=2)
         positions = pca.fit_transform(positions)
         positions = np.hstack((positions, np.zeros((len(positions), 1))))
-    elif DIMENSIONS == 3:
+    elif dimensions == 3:
         pca = PCA(n_components=3)
         pca.fit(positions)
         positions = pca.transform(positions)
-    elif DIMENSIONS > 3:
+    elif dimensions > 3:
         pca = PCA(n_components=3)
         positions = pca.fit_transform(positions)
     
@@ -170,11 +216,17 @@ def normalize_positions(positions, margin_size):
 
 def get_margin_size(G):
     first_node = list(G.nodes())[-1]
-    font = pygame.font.Font('assets/JetBrainsMono-Light.otf', 12)
+    font = pygame.font.Font(FONT_PATH, 12)
     label_width = font.size(str(first_node))[0]
     return math.ceil(label_width*0.5)
 
-def prepare_graph(G, margin_size):
+def read_edo(file_path):
+    with open(file_path, 'r') as file:
+        first_line = file.readline().strip()
+    return int(first_line[1:])
+
+@tracing.traced()
+def find_components(G):
     # print(f'total number of vertices: {G.number_of_nodes()}')
     # print(f'total number of edges: {G.number_of_edges()}')
     
@@ -191,37 +243,358 @@ def prepare_graph(G, margin_size):
     
     subgraphs = [G.subgraph(c).copy() for c in components]
     subgraphs = [sg for sg in subgraphs if sg.number_of_nodes() >= 3]
-    subgraphs = sorted(subgraphs, key=lambda sg: sg.number_of_nodes(), reverse=True)
-    
-    positioned_subgraphs = []
+    return sorted(subgraphs, key=lambda sg: sg.number_of_nodes(), reverse=True)
+
+@tracing.traced()
+def layout_positions(sg, iterations=ITERATIONS, dimensions=DIMENSIONS, seed=LAYOUT_SEED, initial=None, edo=None,
+                     start=None, checkpoint=None):
+    # raw layout positions in sg.nodes() order. initial positions resume a layout that has run start
+    # iterations. a warm start (start None) only needs to settle the layout, so it runs the last
+    # fraction of the cooling schedule. edo asks for the symmetric layout of apply_spring_layout_nd
+    if initial is None:
+        start = 0
+    elif start is None:
+        start = iterations - max(1, int(iterations * WARM_START_FRACTION))
+    elif start >= iterations:
+        return np.asarray(initial, dtype=float)
+    algorithm = layout_cache.LAYOUT_ALGORITHM if edo is None else f'{layout_cache.LAYOUT_ALGORITHM}_symmetric'
+    key = layout_cache.graph_key(sg, dimensions, iterations, seed, algorithm, initial=initial, start=start)
+    positions = layout_cache.load(key, sg.nodes())
+    if positions is None:
+        positions = apply_spring_layout_nd(sg, iterations, dimensions=dimensions, seed=seed, initial=initial,
+                                           edo=edo, start=start, checkpoint=checkpoint)
+        layout_cache.store(key, sg.nodes(), positions)
+    else:
+        print(f'layout cache hit: {sg.number_of_nodes()} nodes, {key[:12]}')
+    return positions
+
+def layout_component(sg, margin_size, iterations=ITERATIONS, dimensions=DIMENSIONS, seed=LAYOUT_SEED, initial=None,
+                     edo=None):
+    return normalize_positions(layout_positions(sg, iterations, dimensions, seed, initial, edo), margin_size,
+                               dimensions)
+
+@tracing.traced()
+def warm_start(sg, known, seed=LAYOUT_SEED):
+    # initial positions from a previous layout, matched by label. new chords start at the mean of
+    # their placed neighbors, and chords with none nearby start around the middle. None if no chord
+    # was placed before
+    nodes = list(sg.nodes())
+    placed = {node: known[node] for node in nodes if node in known}
+    if not placed:
+        return None
+    rng = np.random.default_rng(seed)
+    spread = np.std(list(placed.values()), axis=0) * 0.1
+    undirected = sg.to_undirected(as_view=True)
+    waiting = [node for node in nodes if node not in placed]
+    while waiting:
+        found = {}
+        for node in waiting:
+            neighbors = [placed[n] for n in undirected.neighbors(node) if n in placed]
+            if neighbors:
+                found[node] = np.mean(neighbors, axis=0) + rng.normal(0, 1, len(spread)) * spread
+        if not found:
+            middle = np.mean(list(placed.values()), axis=0)
+            found = {node: middle + rng.normal(0, 1, len(spread)) * spread for node in waiting}
+        placed.update(found)
+        waiting = [node for node in waiting if node not in found]
+    return np.array([placed[node] for node in nodes])
+
+def component_key(sg, dimensions):
+    # the graph_key a positions file stores for the chords of a component
+    return layout_cache.graph_key(sg, dimensions, 0, LAYOUT_SEED)
+
+def read_previous(path, dimensions=DIMENSIONS):
+    # read_positions, checking the positions fit the layout
+    known, done, graphs = layout_cache.read_positions(path)
+    for position in known.values():
+        if len(position) != dimensions:
+            raise ValueError(f'{path} has {len(position)} dimensional positions, not {dimensions}')
+        break
+    return known, done, graphs
+
+def resume_starts(subgraphs, known, done, graphs, iterations=ITERATIONS, dimensions=DIMENSIONS):
+    # initial positions and starting iterations for each subgraph from the contents of a positions
+    # file. a component that was laid out before resumes where its layout stopped, any other one is
+    # warm started (start None) from the chords it shares with the file, new chords near their neighbors
+    initials, starts = [], []
     for sg in subgraphs:
-        positions = apply_spring_layout_nd(sg, ITERATIONS)
-        normalized_positions = normalize_positions(positions, margin_size)
-        positioned_subgraphs.append((sg, normalized_positions))
-    
-    return positioned_subgraphs
+        key = component_key(sg, dimensions)
+        nodes = list(sg.nodes())
+        if all(graphs.get(node) == key for node in nodes) and len({done[node] for node in nodes}) == 1:
+            initials.append(np.array([known[node] for node in nodes]))
+            starts.append(min(done[nodes[0]], iterations))
+        else:
+            initials.append(warm_start(sg, known))
+            starts.append(None)
+    return initials, starts
+
+def prepare_graph(G, margin_size, iterations=ITERATIONS, dimensions=DIMENSIONS, edo=None, previous=None,
+                  checkpoint=None):
+    # previous is a positions file to start from, see resume_starts. every component's raw positions
+    # are saved to the checkpoint positions file while it is laid out and when it is done, so a run
+    # that was interrupted or was too short can be resumed with the checkpoint as previous
+    subgraphs = find_components(G)
+    initials, starts = [None] * len(subgraphs), [None] * len(subgraphs)
+    saved, done, graphs = {}, {}, {}
+    if previous is not None:
+        known, known_done, known_graphs = read_previous(previous, dimensions)
+        initials, starts = resume_starts(subgraphs, known, known_done, known_graphs, iterations, dimensions)
+        # chords of components that aren't reached before an interruption keep their progress
+        for node in G.nodes():
+            if node in known:
+                saved[node], done[node], graphs[node] = known[node], known_done[node], known_graphs[node]
+
+    def save(sg, positions, count):
+        key = component_key(sg, dimensions)
+        for node, position in zip(sg.nodes(), positions):
+            saved[node], done[node], graphs[node] = position, count, key
+        layout_cache.write_positions(checkpoint, saved, done, graphs)
+
+    prepared = []
+    for sg, initial, start in zip(subgraphs, initials, starts):
+        checkpointer = (lambda positions, count, sg=sg: save(sg, positions, count)) if checkpoint else None
+        raw = layout_positions(sg, iterations, dimensions, LAYOUT_SEED, initial, edo, start, checkpointer)
+        if checkpoint is not None:
+            save(sg, raw, iterations)
+        prepared.append((sg, normalize_positions(raw, margin_size, dimensions)))
+    return prepared
+
+class ComponentLayouts:
+    # lays components out on first request and prefetches the neighbors in worker processes.
+    # raw keeps the positions before normalizing, they are the warm start when refiltering.
+    # edo lays components out symmetrically, starts are the iterations initials have run, see resume_starts
+    def __init__(self, subgraphs, margin_size, iterations=ITERATIONS, dimensions=DIMENSIONS, workers=2,
+                 initials=None, raw=None, edo=None, starts=None):
+        self.subgraphs = subgraphs
+        self.edo = edo
+        self.margin_size = margin_size
+        self.iterations = iterations
+        self.dimensions = dimensions
+        self.initials = initials or [None] * len(subgraphs)
+        self.starts = starts or [None] * len(subgraphs)
+        self.raw = dict(raw or {})
+        self.positions = {}
+        self.pending = {}
+        self.pool = ProcessPoolExecutor(max_workers=workers) if workers else None
+
+    def __len__(self):
+        return len(self.subgraphs)
+
+    def is_ready(self, index):
+        return index in self.positions or (index in self.pending and self.pending[index].done())
+
+    def get(self, index):
+        if index not in self.positions:
+            future = self.pending.pop(index, None)
+            if future is not None:
+                self.raw[index] = future.result()
+            elif index not in self.raw:
+                self.raw[index] = layout_positions(self.subgraphs[index], self.iterations, self.dimensions,
+                                                   initial=self.initials[index], edo=self.edo,
+                                                   start=self.starts[index])
+            self.positions[index] = normalize_positions(self.raw[index], self.margin_size, self.dimensions)
+        return self.subgraphs[index], self.positions[index]
+
+    def known_positions(self):
+        # label -> raw position for every chord laid out so far
+        known = {}
+        for index, raw in self.raw.items():
+            known.update(zip(self.subgraphs[index].nodes(), raw))
+        return known
+
+    def prefetch(self, index):
+        if self.pool is None:
+            return
+        for i in (index + 1, index - 1):
+            i %= len(self.subgraphs)
+            if i not in self.positions and i not in self.pending and i not in self.raw:
+                self.pending[i] = self.pool.submit(layout_positions, self.subgraphs[i], self.iterations,
+                                                   self.dimensions, LAYOUT_SEED, self.initials[i], self.edo,
+                                                   self.starts[i])
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+def save_layouts(path, layouts, previous=({}, {}, {})):
+    # writes every component laid out so far to a positions file, with the other chords of previous
+    saved, done, graphs = (dict(d) for d in previous)
+    for index, raw in layouts.raw.items():
+        sg = layouts.subgraphs[index]
+        key = component_key(sg, layouts.dimensions)
+        for node, position in zip(sg.nodes(), raw):
+            saved[node], done[node], graphs[node] = position, layouts.iterations, key
+    layout_cache.write_positions(path, saved, done, graphs)
+
+@tracing.traced()
+def refilter_layouts(filtered, keep, layouts, margin_size):
+    # components that didn't change keep their layout, the others start from every chord placed so far
+    known = layouts.known_positions()
+    laid_out = {layout_cache.graph_key(layouts.subgraphs[i], layouts.dimensions, layouts.iterations, LAYOUT_SEED)
+                for i in layouts.raw}
+    subgraphs = [filtered.subgraph(nodes, arcs) for nodes, arcs in filtered.components(keep)]
+    raw, initials = {}, []
+    for i, sg in enumerate(subgraphs):
+        if layout_cache.graph_key(sg, layouts.dimensions, layouts.iterations, LAYOUT_SEED) in laid_out:
+            raw[i] = np.array([known[node] for node in sg.nodes()])
+            initials.append(None)
+        else:
+            initials.append(warm_start(sg, known))
+    return ComponentLayouts(subgraphs, margin_size, layouts.iterations, layouts.dimensions,
+                            initials=initials, raw=raw, edo=layouts.edo)
+
+class ComponentView:
+    def __init__(self, G, positions, font, label_colors):
+        self.G = G
+        self.positions = positions
+        self.font = font
+        self.nodes = list(G.nodes())
+        index = {node: i for i, node in enumerate(self.nodes)}
+        self.edges = np.array([(index[a], index[b]) for a, b in G.edges()], dtype=np.intp).reshape(-1, 2)
+        np.random.default_rng(LAYOUT_SEED).shuffle(self.edges)
+        self.colors = generate_label_colors(self.nodes, label_colors)
+        self.base_colors = np.array(self.colors, dtype=np.uint8).reshape(-1, 3)
+        self.color_array = self.base_colors
+        self.mapped_colors = None
+        self.index = None
+        # labels are rendered on first use, so only nodes that get a label pay for it
+        self.surfaces = [None] * len(self.nodes)
+        char_width, char_height = font.size('0')
+        self.label_widths = np.array([char_width * len(str(n)) + 2 for n in self.nodes], dtype=np.intp)
+        self.label_size = (int(self.label_widths.max()), char_height - 4)
+
+    def surface(self, i):
+        if self.surfaces[i] is None:
+            self.surfaces[i] = self.font.render(str(self.nodes[i]), False, self.color_array[i])
+        return self.surfaces[i]
+
+    def highlight(self, edo, notes=None, shapes=None):
+        # chords outside the selection are dimmed, only labels whose color changed are rendered again
+        if self.index is None:
+            self.index = ChordIndex(self.nodes, edo)
+        selected = self.index.select(notes, shapes)
+        if selected is None:
+            colors = self.base_colors
+        else:
+            colors = np.where(selected[:, None], self.base_colors, self.base_colors // HIGHLIGHT_DIM)
+        for i in np.flatnonzero((colors != self.color_array).any(axis=1)).tolist():
+            self.surfaces[i] = None
+        self.color_array = colors
+        self.mapped_colors = None
+
+def nearest_per_cell(xy, z, candidates, cell_width, cell_height):
+    # the nearest of the candidates in each screen cell, found with a depth buffer instead of a sort
+    columns = int(WINDOW_SIZE // cell_width) + 1
+    rows = int(WINDOW_SIZE // cell_height) + 1
+    cells = (xy[candidates, 1] // cell_height).astype(np.intp) * columns + \
+            (xy[candidates, 0] // cell_width).astype(np.intp)
+    depth = np.full(columns * rows, np.inf)
+    np.minimum.at(depth, cells, z[candidates])
+    nearest = z[candidates] == depth[cells]
+    # ties in depth keep the first candidate
+    _, first = np.unique(cells[nearest], return_index=True)
+    return candidates[nearest][first]
+
+def footprint_cull(xy, order, widths, height):
+    # keeps labels in `order` whose rectangle doesn't overlap one already kept
+    pad = int(widths.max()) + height
+    taken = np.zeros((WINDOW_SIZE + 2*pad, WINDOW_SIZE + 2*pad), dtype=bool)
+    kept = []
+    for i in order.tolist():
+        left = int(xy[i, 0] - widths[i] / 2) + pad
+        top = int(xy[i, 1] - height / 2) + pad
+        area = taken[left:left+widths[i], top:top+height]
+        if not area.any():
+            area[...] = True
+            kept.append(i)
+    return np.array(kept, dtype=np.intp)
+
+def draw_edges(screen, xy, edges):
+    # past the budget the screen is saturated anyway. edges are stored shuffled, so the first visible
+    # ones are an even sample of the graph, and only as many blocks are checked as it takes to find them
+    drawn = 0
+    for block in range(0, len(edges), 2*MAX_EDGES):
+        start = xy[edges[block:block+2*MAX_EDGES, 0]]
+        end = xy[edges[block:block+2*MAX_EDGES, 1]]
+        # edges entirely to one side of the screen, or shorter than a pixel, can't be seen
+        visible = ~(((start < 0) & (end < 0)) | ((start >= WINDOW_SIZE) & (end >= WINDOW_SIZE))).any(axis=1)
+        visible &= np.abs(end - start).max(axis=1) >= 1
+        for a, b in edges[block:block+2*MAX_EDGES][visible][:MAX_EDGES - drawn].tolist():
+            pygame.draw.line(screen, EDGE_COLOR, xy[a], xy[b])
+        drawn += min(int(visible.sum()), MAX_EDGES - drawn)
+        if drawn >= MAX_EDGES:
+            break
+
+def draw_dots(screen, view, xy, dotted):
+    if view.mapped_colors is None:
+        view.mapped_colors = pygame.surfarray.map_array(screen, view.color_array)
+    half = DOT_SIZE // 2
+    x = np.floor(xy[dotted, 0]).astype(np.intp) - half
+    y = np.floor(xy[dotted, 1]).astype(np.intp) - half
+    colors = view.mapped_colors[dotted]
+    pixels = pygame.surfarray.pixels2d(screen)
+    for dx in range(DOT_SIZE):
+        for dy in range(DOT_SIZE):
+            inside = (x + dx >= 0) & (x + dx < WINDOW_SIZE) & (y + dy >= 0) & (y + dy < WINDOW_SIZE)
+            pixels[x[inside] + dx, y[inside] + dy] = colors[inside]
+    del pixels
+
+def draw_label(screen, view, i, pos):
+    text_surface = view.surface(i)
+    text_rect = text_surface.get_rect(center=pos)
+
+    bg_rect = pygame.Rect(text_rect.left-1, text_rect.top+3,
+                          text_rect.width+2, text_rect.height-4)
+    pygame.draw.rect(screen, BLACK, bg_rect)
+
+    screen.blit(text_surface, text_rect)
 
-def draw_graph(screen, font, G, positions, rotation_quat, colors):
+@tracing.traced()
+def draw_graph(screen, view, camera, lod=True, timings=None):
+    # timings, when given, gets the seconds spent projecting, drawing edges and drawing labels
+    start = time.perf_counter()
     screen.fill(BLACK)
-    rotated_positions = rotation_quat.apply(positions - WINDOW_SIZE/2) + WINDOW_SIZE/2
-    
-    for edge in G.edges():
-        start = rotated_positions[list(G.nodes()).index(edge[0])][:2]
-        end = rotated_positions[list(G.nodes()).index(edge[1])][:2]
-        pygame.draw.line(screen, (119, 119, 119), start, end)
-    
-    for i, node in enumerate(G.nodes()):
-        pos = rotated_positions[i][:2]
-        label = str(node)
-        color = colors[i]
-        text_surface = font.render(label, False, color)
-        text_rect = text_surface.get_rect(center=pos)
-        
-        bg_rect = pygame.Rect(text_rect.left-1, text_rect.top+3,
-                              text_rect.width+2, text_rect.height-4)
-        pygame.draw.rect(screen, BLACK, bg_rect)
-        
-        screen.blit(text_surface, text_rect)
+    rotated_positions = camera.project(view.positions)
+    xy = rotated_positions[:, :2]
+    z = rotated_positions[:, 2]
+    projected = time.perf_counter()
+
+    draw_edges(screen, xy, view.edges)
+    edges_drawn = time.perf_counter()
+
+    draw_labels(screen, view, xy, z, lod)
+    if timings is not None:
+        timings['project'] = projected - start
+        timings['edges'] = edges_drawn - projected
+        timings['labels'] = time.perf_counter() - edges_drawn
+
+def draw_labels(screen, view, xy, z, lod=True):
+    if not lod:
+        for i in range(len(view.nodes)):
+            draw_label(screen, view, i, xy[i])
+        return
+
+    on_screen = np.flatnonzero(np.all((xy >= 0) & (xy < WINDOW_SIZE), axis=1))
+    if len(on_screen) == 0:
+        return
+
+    # z points into the screen, so smaller z is nearer
+    label_width, label_height = view.label_size
+    extent = np.ptp(xy[on_screen], axis=0) + (label_width, label_height)
+    if extent[0]*extent[1] / len(on_screen) < LOD_MIN_AREA * label_width*label_height:
+        labeled = on_screen[:0]
+    else:
+        candidates = nearest_per_cell(xy, z, on_screen, label_width, label_height)
+        candidates = candidates[np.argsort(z[candidates], kind='stable')]
+        labeled = footprint_cull(xy, candidates, view.label_widths, label_height)
+
+    is_labeled = np.zeros(len(view.nodes), dtype=bool)
+    is_labeled[labeled] = True
+    dotted = nearest_per_cell(xy, z, on_screen[~is_labeled[on_screen]], DOT_SIZE, DOT_SIZE)
+    draw_dots(screen, view, xy, dotted)
+
+    for i in labeled[::-1]:
+        draw_label(screen, view, i, xy[i])
 
 def draw_selection_panel(screen, font, current_index, total_components):
     left_arrow = pygame.Rect(0, 0, BUTTON_SIZE, BUTTON_SIZE)
@@ -248,23 +621,40 @@ def draw_selection_panel(screen, font, current_index, total_components):
     text_rect = text_surface.get_rect(left=right_arrow.right, centery=right_arrow.centery-1)
     screen.blit(text_surface, text_rect)
 
+PROMPT_KEYS = {pygame.K_n: 'notes', pygame.K_s: 'shapes', pygame.K_i: 'inclusions', pygame.K_e: 'exclusions'}
+
+def draw_prompt(screen, font, text):
+    text_surface = font.render(text, False, WHITE)
+    text_rect = text_surface.get_rect(left=2, bottom=WINDOW_SIZE-2)
+    pygame.draw.rect(screen, DARK_GRAY, text_rect.inflate(4, 0))
+    screen.blit(text_surface, text_rect)
+
 def main():
     pygame.init()
-    font = pygame.font.Font('assets/JetBrainsMono-Light.otf', 12)
+    font = pygame.font.Font(FONT_PATH, 12)
 
     try:
         print()
         file_path = 'graph.net'
-        net_file = read_net_file(file_path)
+        with progress.Stage('parse'):
+            net_file = read_net_file(file_path)
         margin_size = get_margin_size(net_file)
-        positioned_subgraphs = prepare_graph(net_file, margin_size)
+        with progress.Stage('components'):
+            subgraphs = find_components(net_file)
+        EDO = read_edo(file_path)
+        previous, initials, starts = ({}, {}, {}), None, None
+        if POSITIONS_FILE is not None and os.path.exists(POSITIONS_FILE):
+            # only this graph's chords, labels mean other chords in another EDO
+            previous = tuple({node: d[node] for node in net_file.nodes() if node in d}
+                             for d in read_previous(POSITIONS_FILE))
+            initials, starts = resume_starts(subgraphs, *previous)
+        layouts = ComponentLayouts(subgraphs, margin_size, initials=initials, starts=starts,
+                                   edo=EDO if SYMMETRIC_LAYOUT and DO_ALL_KEYS else None)
         current_component = 0
-        G, positions = positioned_subgraphs[current_component]
-        with open(file_path, 'r') as file:
-            first_line = file.readline().strip()
-            EDO = int(first_line[1:])
         label_colors = get_hue_colors(EDO, 145)
-        colors = generate_label_colors(G, label_colors)
+        # views keep their colors and rendered labels, so switching back is instant
+        views = {current_component: ComponentView(*layouts.get(current_component), font, label_colors)}
+        layouts.prefetch(current_component)
     except ValueError as e:
         print(f'error: {e}')
         sys.exit(1)
@@ -274,13 +664,76 @@ def main():
 
     screen = pygame.display.set_mode((WINDOW_SIZE, WINDOW_SIZE))
     pygame.display.set_caption(TITLE)
-    pygame.display.set_icon(pygame.image.load('assets/icon.png'))
+    pygame.display.set_icon(pygame.image.load(os.path.join(ASSETS_DIR, 'icon.png')))
     clock = pygame.time.Clock()
 
-    rotation_quat = Rotation.from_quat([0, 0, 0, 1])
-    angular_velocity = np.zeros(3)
+    def get_view(index):
+        if index not in views:
+            if not layouts.is_ready(index):
+                text_surface = font.render('laying out...', False, WHITE)
+                screen.blit(text_surface, text_surface.get_rect(center=(WINDOW_SIZE/2, WINDOW_SIZE/2)))
+                pygame.display.flip()
+            views[index] = ComponentView(*layouts.get(index), font, label_colors)
+            if highlight['notes'] or highlight['shapes']:
+                views[index].highlight(EDO, highlight['notes'], highlight['shapes'])
+        layouts.prefetch(index)
+        return views[index]
+
+    def apply_prompt():
+        nonlocal filtered, layouts, current_component
+        if prompt in ('inclusions', 'exclusions'):
+            shapes, both = parse_filter(prompt_text)
+            changed = dict(filters)
+            changed[prompt] = shapes
+            if both is not None:
+                changed['include_and' if prompt == 'inclusions' else 'exclude_and'] = both
+            start = time.perf_counter()
+            if filtered is None:
+                # the unfiltered graph for the settings graph.net was generated with, built on first use
+                chord_sizes = CHORD_SIZE if isinstance(CHORD_SIZE, list) else (CHORD_SIZE, CHORD_SIZE)
+                filtered = FilteredGraph(EDO, chord_sizes, INTERVALS, DO_ALL_KEYS, SIMPLIFY_SYMBOLS,
+                                         TRUNCATE_SYMBOLS, add_notes=ADD_REMOVE_NOTES,
+                                         remove_notes=ADD_REMOVE_NOTES, flips=FLIP_CHORDS,
+                                         complements=COMPLEMENT_CHORDS, remove_reflections=REMOVE_REFLECTIONS,
+                                         remove_complements=REMOVE_COMPLEMENTS, scales=SCALES)
+            refiltered = refilter_layouts(filtered, filtered.arc_mask(**changed), layouts, margin_size)
+            if len(refiltered) == 0:
+                print(f'error: no components are left with these filters')
+                refiltered.close()
+                return
+            layouts.close()
+            layouts = refiltered
+            filters.update(changed)
+            views.clear()
+            current_component = 0
+            print(f'{len(layouts)} components ({(time.perf_counter() - start)*1000:.1f} ms)')
+            return
+        try:
+            parse = parse_notes if prompt == 'notes' else parse_shapes
+            highlight[prompt] = parse(prompt_text, EDO)
+        except ValueError as e:
+            print(f'error: {e}')
+            return
+        # views that aren't shown are highlighted when they are next shown
+        for view in views.values():
+            view.highlight(EDO, highlight['notes'], highlight['shapes'])
+
+    camera = Camera((WINDOW_SIZE/2, WINDOW_SIZE/2, WINDOW_SIZE/2))
+    angular_velocity = camera.angular_velocity
     last_pos = None
     running = True
+    lod = True
+    # n highlights chords containing notes, s highlights chord shapes, both together is their intersection
+    highlight = {'notes': None, 'shapes': None}
+    # i and e change the inclusions and exclusions without regenerating, a leading & or | sets and/or
+    filters = {'inclusions': INCLUSIONS, 'exclusions': EXCLUSIONS,
+               'include_and': INCLUDE_AND, 'exclude_and': EXCLUDE_AND}
+    filtered = None
+    prompt = None
+    prompt_text = ''
+    # h shows frame timings, t saves the last HISTORY of them to output/
+    show_hud = False
+    frame_times = FrameTimes()
 
     SCREEN_CENTER = np.array([WINDOW_SIZE/2, WINDOW_SIZE/2, 0])
     ROTATION_SCALE = SENSITIVITY*85 / WINDOW_SIZE
@@ -294,21 +747,42 @@ def main():
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
+            elif event.type == pygame.KEYDOWN and prompt is not None:
+                if event.key == pygame.K_RETURN:
+                    apply_prompt()
+                    prompt = None
+                elif event.key == pygame.K_ESCAPE:
+                    prompt = None
+                elif event.key == pygame.K_BACKSPACE:
+                    prompt_text = prompt_text[:-1]
+                elif event.unicode.isprintable():
+                    prompt_text += event.unicode
+            elif event.type == pygame.KEYDOWN:
+                if event.key in PROMPT_KEYS:
+                    prompt = PROMPT_KEYS[event.key]
+                    prompt_text = ''
+                elif event.key == pygame.K_l:
+                    lod = not lod
+                elif event.key == pygame.K_h:
+                    show_hud = not show_hud
+                elif event.key == pygame.K_t:
+                    timings = os.path.join('output', f'frames_{pygame.time.get_ticks()}.csv')
+                    frame_times.write_csv(timings)
+                    print(f'saved {timings}')
+                elif event.key == pygame.K_p:
+                    screenshot = os.path.join('output', f'{EDO}e_{current_component+1}_{pygame.time.get_ticks()}.png')
+                    pygame.image.save(screen, screenshot)
+                    print(f'saved {screenshot}')
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1:
                     x, y = event.pos
                     y_col = y < BUTTON_SIZE
                     if (0 <= x < BUTTON_SIZE) and y_col:
-                        current_component = (current_component - 1) % len(positioned_subgraphs)
-                        G, positions = positioned_subgraphs[current_component]
-                        colors = generate_label_colors(G, label_colors)
+                        current_component = (current_component - 1) % len(layouts)
                     elif (BUTTON_SIZE <= x < 2 * BUTTON_SIZE) and y_col:
-                        current_component = (current_component + 1) % len(positioned_subgraphs)
-                        G, positions = positioned_subgraphs[current_component]
-                        colors = generate_label_colors(G, label_colors)
+                        current_component = (current_component + 1) % len(layouts)
                     elif (WINDOW_SIZE - BUTTON_SIZE <= x < WINDOW_SIZE) and y_col:
-                        rotation_quat = Rotation.from_quat([0, 0, 0, 1])
-                        angular_velocity = np.zeros(3)
+                        camera.reset()
                     else:
                         last_pos = event.pos
             elif event.type == pygame.MOUSEBUTTONUP:
@@ -335,20 +809,27 @@ def main():
 
                 last_pos = (x, y)
 
-        angle = np.linalg.norm(angular_velocity)
-        if angle > 0:
-            axis = angular_velocity / angle
-            rot_delta = Rotation.from_rotvec(angle * axis)
-            rotation_quat = rot_delta * rotation_quat
+        camera.update(DAMPING_FACTOR)
 
-        angular_velocity *= DAMPING_FACTOR
+        view = get_view(current_component)
+        draw_graph(screen, view, camera, lod, frame_times.current)
+        draw_selection_panel(screen, font, current_component, len(layouts))
+        if prompt is not None:
+            draw_prompt(screen, font, f'{prompt}: {prompt_text}_')
+        if show_hud:
+            draw_hud(screen, font, frame_times, len(view.nodes), len(view.edges), FPS, WINDOW_SIZE, BUTTON_SIZE + 2)
 
-        draw_graph(screen, font, G, positions, rotation_quat, colors)
-        draw_selection_panel(screen, font, current_component, len(positioned_subgraphs))
-            
+        start = time.perf_counter()
         pygame.display.flip()
+        flipped = time.perf_counter()
         clock.tick(FPS)
+        frame_times.current['flip'] = flipped - start
+        frame_times.current['wait'] = time.perf_counter() - flipped
+        frame_times.record()
 
+    if POSITIONS_FILE is not None:
+        save_layouts(POSITIONS_FILE, layouts, previous)
+    layouts.close()
     pygame.quit()
 
 if __name__ == '__main__':
@@ -654,7 +1135,7 @@ do the algorithm in 12 dimensions and then do math on the eigenmode signature of
 
 #     screen = pygame.display.set_mode((WINDOW_SIZE, WINDOW_SIZE))
 #     pygame.display.set_caption(TITLE)
-#     pygame.display.set_icon(pygame.image.load('assets/icon.png'))
+#     pygame.display.set_icon(pygame.image.load(os.path.join(ASSETS_DIR, 'icon.png')))
 #     clock = pygame.time.Clock()
 
 #     rotation_quat = Rotation.from_quat([0, 0, 0, 1])
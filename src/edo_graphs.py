@@ -1,6 +1,10 @@
 from itertools import combinations
 from os import system
-from temp_settings import *
+import tempfile
+import numpy as np
+import progress
+import tracing
+from kernels import smallest_rotations
 
 def all_rotations(bin_str):
     return [bin_str[i:] + bin_str[:i] for i in range(len(bin_str))]
@@ -12,6 +16,7 @@ def binaries_with_n_ones(length, num_ones):
     return [''.join('1' if i in comb else '0' for i in range(length)) 
             for comb in combinations(range(length), num_ones)]
 
+@tracing.traced()
 def unique_binaries(edo, chord_size):
     binaries = set()
     for binary in binaries_with_n_ones(edo, chord_size):
@@ -19,7 +24,9 @@ def unique_binaries(edo, chord_size):
     return sorted(binaries, key=lambda x: int(x, 2))
 
 def all_unique_binaries(edo):
-    return [unique_binaries(edo, s) for s in range(edo+1)]
+    reps = unique_masks(edo)
+    sizes = popcount(reps, edo)
+    return [[format(int(m), f'0{edo}b') for m in reps[sizes == s]] for s in range(edo+1)]
 
 CHARACTERS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
 CHAR_TO_VALUE = {char: index for index, char in enumerate(CHARACTERS)}
@@ -93,6 +100,7 @@ def interval_neighbors(bin_str, offsets, reduce):
                     shifted_numbers.add(''.join(shifted))
     return shifted_numbers
 
+@tracing.traced()
 def generate_rotated_instructions(transformations, edo, simplify_symbol=False, truncate=True):
     labels = set()
     instructions = set()
@@ -117,6 +125,7 @@ def generate_rotated_instructions(transformations, edo, simplify_symbol=False, t
                 instructions.add((t0, t1))
     return labels, instructions
 
+@tracing.traced()
 def generate_instructions(transformations, edo, simplify_symbol=False, truncate=True):
     labels = set()
     instructions = set()
@@ -138,8 +147,27 @@ def generate_instructions(transformations, edo, simplify_symbol=False, truncate=
             instructions.add((t0, t1))
     return labels, instructions
 
+def passes_filters(t0, t1, inclusions, exclusions, include_and, exclude_and):
+    cond_0i = any(e in t0 for e in inclusions) if inclusions else True
+    cond_1i = any(e in t1 for e in inclusions) if inclusions else True
+    cond_0e = not any(e in t0 for e in exclusions) if exclusions else True
+    cond_1e = not any(e in t1 for e in exclusions) if exclusions else True
+
+    if include_and:
+        if exclude_and:
+            return (cond_0i and cond_1i) and (cond_0e and cond_1e)
+        else:
+            return (cond_0i and cond_1i) and (cond_0e or cond_1e)
+    else:
+        if exclude_and:
+            return (cond_0i or cond_1i) and (cond_0e and cond_1e)
+        else:
+            return (cond_0i or cond_1i) and (cond_0e or cond_1e)
+
+@tracing.traced()
 def generate_transformations(edo, chord_size, intervals, do_all_keys,
-                             inclusions, exclusions, include_and, exclude_and, simplify_symbol=False, truncate=True):
+                             inclusions, exclusions, include_and, exclude_and, simplify_symbol=False, truncate=True,
+                             scales=False):
     
     if type(inclusions) == str:
         inclusions = list(inclusions)
@@ -149,114 +177,482 @@ def generate_transformations(edo, chord_size, intervals, do_all_keys,
         intervals = [intervals]
 
     binaries = unique_binaries(edo, chord_size)
+    tracing.count('chords', enumerated=len(binaries))
 
     transformations = set()
-    for b in binaries:
-        if do_all_keys:
-            neighbors = interval_neighbors(b, intervals, False)
-        else:
-            neighbors = interval_neighbors(b, intervals, True)
-        for n in neighbors:
-            transformations.add((binary_to_symbol(b[::-1], edo, simplify_symbol),
-                                 binary_to_symbol(n[::-1], edo, simplify_symbol)))
+    generating = progress.Stage('generate', len(binaries))
+    with tracing.span('interval_neighbors'):
+        for b in binaries:
+            if do_all_keys:
+                neighbors = interval_neighbors(b, intervals, False)
+            else:
+                neighbors = interval_neighbors(b, intervals, True)
+            for n in neighbors:
+                transformations.add((binary_to_symbol(b[::-1], edo, simplify_symbol),
+                                     binary_to_symbol(n[::-1], edo, simplify_symbol)))
+            generating.advance()
+    generating.finish()
     transformations = list(transformations)
+    filtering = progress.Stage('instructions', len(transformations))
     transformations_filtered = []
-    for t in transformations:
-        try:
-            t0 = t[0].split('.')[0]
-            t1 = t[1].split('.')[0]
-        except:
-             t0 = t[0]
-             t1 = t[1]
-        cond_0i = any(e in t0 for e in inclusions) if inclusions else True
-        cond_1i = any(e in t1 for e in inclusions) if inclusions else True
-        cond_0e = not any(e in t0 for e in exclusions) if exclusions else True
-        cond_1e = not any(e in t1 for e in exclusions) if exclusions else True
-
-        if include_and:
-            if exclude_and:
-                cond = (cond_0i and cond_1i) and (cond_0e and cond_1e)
-            else:
-                cond = (cond_0i and cond_1i) and (cond_0e or cond_1e)
-        else:
-            if exclude_and:
-                cond = (cond_0i or cond_1i) and (cond_0e and cond_1e)
-            else:
-                cond = (cond_0i or cond_1i) and (cond_0e or cond_1e)
-
-        if cond:
-            transformations_filtered.append(t)
+    with tracing.span('passes_filters'):
+        for t in transformations:
+            try:
+                t0 = t[0].split('.')[0]
+                t1 = t[1].split('.')[0]
+            except:
+                 t0 = t[0]
+                 t1 = t[1]
+            if passes_filters(t0, t1, inclusions, exclusions, include_and, exclude_and):
+                transformations_filtered.append(t)
+    tracing.count('arcs', produced=len(transformations),
+                  filtered=len(transformations) - len(transformations_filtered))
     if do_all_keys:
-        return generate_rotated_instructions(transformations_filtered, edo, simplify_symbol, truncate)
+        labels, arcs = generate_rotated_instructions(transformations_filtered, edo, simplify_symbol, truncate)
     else:
-        return generate_instructions(transformations_filtered, edo, simplify_symbol, truncate)
-
+        labels, arcs = generate_instructions(transformations_filtered, edo, simplify_symbol, truncate)
+    if scales:
+        labels, arcs = filter_scale_arcs(labels, arcs, edo, scales, do_all_keys, intervals, truncate)
+    filtering.advance(len(transformations))
+    filtering.finish()
+    return labels, arcs
+
+@tracing.traced()
 def write_net_file(filename, labels, arcs, EDO):
     labels = list(labels)
-    arcs = [(labels.index(i[0])+1, labels.index(i[1])+1) for i in arcs]
-    with open(filename, 'w') as file:
+    with tracing.span('index'):
+        index = {label: i+1 for i, label in enumerate(labels)}
+        arcs = [(index[i[0]], index[i[1]]) for i in arcs]
+    tracing.count('arcs', written=len(arcs))
+    with open(filename, 'w') as file, progress.Stage('write', len(arcs)) as writing:
         file.write(f'%{EDO}\n')
         file.write(f'*Vertices {len(labels)}\n')
         for i, e in enumerate(labels):
             file.write(f'{i+1} "{e}" 0.0 0.0 0.0\n')
         file.write(f'*Arcs \n')
-        for i in arcs:
-            file.write(f'{i[0]} {i[1]} 1.0\n')
-
-
-# EDO = 12
-# TRUNCATE_SYMBOLS = True
-# SIMPLIFY_SYMBOLS = True
-
-# CHORD_SIZE = 2
-# INTERVALS = [7]
-
-# DO_ALL_KEYS = True
-
-# # INCLUSIONS = ['011', '032', '111', '022', '030', '013', '103', '031', '301', '130', '221']
-# INCLUSIONS = False
-# # EXCLUSIONS = ['32', '23']
-# EXCLUSIONS = False
-
-# INCLUDE_AND = True
-# EXCLUDE_AND = False
-
-
-# generates all chord transformations given an interval step, either in all keys or not, then filters them.
-labels, arcs = generate_transformations(EDO, CHORD_SIZE, INTERVALS, DO_ALL_KEYS,
-                                        INCLUSIONS, EXCLUSIONS, INCLUDE_AND, EXCLUDE_AND,
-                                        SIMPLIFY_SYMBOLS, TRUNCATE_SYMBOLS)
-
-
-
-
-
-# chord A  ->  chord B
-# TRANSFORMATIONS =(\
-#     ('32', '34'), # Relative
-#     ('24', '23'), # Leading tone
-#     ('32', '23'), # Parallel
-# )
-# # takes the given chord transformations and transposes them to all keys.
-# labels, arcs = generate_rotated_instructions(TRANSFORMATIONS, EDO, SIMPLIFY_SYMBOLS, TRUNCATE_SYMBOLS)
-
-
-
-write_net_file('src/graph.net', labels, arcs, EDO)
-system('cd src && display_net.py')
-
+        for start in range(0, len(arcs), 1 << 14):
+            for i in arcs[start:start + (1 << 14)]:
+                file.write(f'{i[0]} {i[1]} 1.0\n')
+            writing.advance(len(arcs[start:start + (1 << 14)]))
+
+def read_net_arcs(filename):
+    # reads back what write_net_file writes, without going through networkx
+    with open(filename, 'r') as file:
+        EDO = int(file.readline().strip()[1:])
+        num_labels = int(file.readline().split()[1])
+        labels = [file.readline().split('"')[1] for _ in range(num_labels)]
+        file.readline()
+        arcs = []
+        for line in file:
+            a, b = line.split()[:2]
+            arcs.append((labels[int(a)-1], labels[int(b)-1]))
+    return labels, arcs, EDO
+
+
+# integer masks: bit q is pitch class q, so int(b, 2) for the binaries above and
+# int(s[::-1], 2) for the strings binary_to_symbol takes. an interval step moves
+# pitch q to q - offset, the same move interval_neighbors makes on binaries.
+
+def popcount(masks, edo):
+    counts = np.zeros(len(masks), dtype=np.int64)
+    for q in range(edo):
+        counts += (masks >> q) & 1
+    return counts
+
+def sorted_unique(keys):
+    # np.unique without the hashing path newer numpy takes, which is much slower on large int arrays
+    keys = np.sort(keys)
+    if len(keys):
+        keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+    return keys
+
+def transpose_masks(masks, steps, edo):
+    steps %= edo
+    return ((masks << steps) | (masks >> (edo - steps))) & ((1 << edo) - 1)
+
+ROTATION_TABLES = {}
+def rotation_table(edo):
+    # smallest transposition of every mask, and the key it has to be transposed up by to get back
+    if edo not in ROTATION_TABLES:
+        ROTATION_TABLES[edo] = smallest_rotations(np.arange(1 << edo, dtype=np.int64), edo)
+    return ROTATION_TABLES[edo]
+
+def reflect_masks(masks, edo):
+    # mirrors every chord about pitch class 0, q -> -q
+    reflected = masks & 1
+    for q in range(1, edo):
+        reflected |= ((masks >> q) & 1) << (edo - q)
+    return reflected
+
+def complement_masks(masks, edo):
+    return ~masks & ((1 << edo) - 1)
+
+ORBIT_TABLES = {}
+def orbit_table(edo, reflections=False, complements=False, chord_sizes=None):
+    # smallest mask reachable by transposing, and optionally mirroring and complementing.
+    # mirroring and complementing commute with transposition up to a change of key, so the smallest
+    # transposition of each of m, mirror(m), complement(m) and both covers the whole orbit.
+    # with chord_sizes = (smallest, largest) a complemented orbit is represented by a chord of an
+    # allowed size, the complement of a chord usually has a different number of notes
+    if not reflections and not complements:
+        return rotation_table(edo)[0]
+    if (edo, reflections, complements, chord_sizes) not in ORBIT_TABLES:
+        masks = np.arange(1 << edo, dtype=np.int64)
+        canonical = rotation_table(edo)[0]
+        if reflections:
+            canonical = np.minimum(canonical, canonical[reflect_masks(masks, edo)])
+        if complements:
+            flipped = canonical[complement_masks(masks, edo)]
+            if chord_sizes is None:
+                canonical = np.minimum(canonical, flipped)
+            else:
+                sizes = popcount(masks, edo)
+                inside = (sizes >= max(chord_sizes[0], 1)) & (sizes <= chord_sizes[1])
+                flipped_inside = inside[complement_masks(masks, edo)]
+                canonical = np.where(inside & flipped_inside, np.minimum(canonical, flipped),
+                                     np.where(flipped_inside, flipped, canonical))
+        ORBIT_TABLES[edo, reflections, complements, chord_sizes] = canonical
+    return ORBIT_TABLES[edo, reflections, complements, chord_sizes]
+
+def unique_masks(edo, reflections=False, complements=False, chord_sizes=None):
+    canonical = orbit_table(edo, reflections, complements, chord_sizes)
+    return np.flatnonzero(canonical == np.arange(1 << edo))
+
+def shape_symbol(mask, edo):
+    return zeros_between_ones(''.join('1' if mask >> q & 1 else '0' for q in range(edo)))
+
+def mask_labels(masks, edo, simplify_symbol=False, truncate=True, rotations=None):
+    # same labels as binary_to_symbol (plus truncation), computed once per shape instead of per chord.
+    # rotations is smallest_rotations(masks, edo), looked up in the rotation table when not given
+    if rotations is None:
+        canonical, key = rotation_table(edo)
+        rotations = canonical[masks], key[masks]
+    shapes = {}
+    labels = []
+    for c, k in zip(rotations[0].tolist(), rotations[1].tolist()):
+        if c not in shapes:
+            symbol = shape_symbol(c, edo)
+            shapes[c] = symbol[:-1] if truncate else symbol
+        labels.append(shapes[c] if simplify_symbol and k == 0 else f'{shapes[c]}.{int_to_base62(k)}')
+    return labels
+
+def mask_moves(masks, edo, intervals, add_notes=False, remove_notes=False):
+    # yields (sources, targets); a step that lands on an existing note merges the two
+    for q in range(edo):
+        bit = 1 << q
+        has = (masks & bit) != 0
+        sources = masks[has]
+        for offset in intervals:
+            yield sources, (sources & ~bit) | (1 << ((q - offset) % edo))
+        if remove_notes:
+            yield sources, sources & ~bit
+        if add_notes:
+            yield masks[~has], masks[~has] | bit
+
+def shape_filter(canonical_masks, edo, inclusions, exclusions, include_and, exclude_and):
+    # applies passes_filters per arc, evaluated once per pair of distinct shapes
+    src, dst = canonical_masks
+    pairs, inverse = np.unique(np.stack([src, dst]), axis=1, return_inverse=True)
+    keep = np.array([passes_filters(shape_symbol(a, edo), shape_symbol(b, edo),
+                                    inclusions, exclusions, include_and, exclude_and)
+                     for a, b in pairs.T.tolist()], dtype=bool)
+    return keep[np.ravel(inverse)]
+
+def symbol_to_mask(symbol, edo, truncate=False):
+    chord, _, key = symbol.partition('.')
+    if truncate:
+        # the last gap is whatever is left of the octave
+        chord += int_to_base62(edo - len(chord) - 1 - sum(base62_to_int(c) for c in chord))
+    bin_str = symbol_to_binary(f'{chord}.{key}' if key else chord, edo, not key)
+    return int(bin_str[::-1], 2)
+
+def parse_chord(text, edo):
+    # a binary string (pitch class 0 first) or a chord symbol with an optional key, full or truncated
+    if len(text) == edo and set(text) <= {'0', '1'}:
+        return int(text[::-1], 2)
+    chord, _, key = text.partition('.')
+    if any(c not in CHAR_TO_VALUE for c in chord + key):
+        raise ValueError(f'not a chord: {text}')
+    # a full symbol's gaps and notes add up to the edo, a truncated one comes up short
+    notes = len(chord) + sum(base62_to_int(c) for c in chord)
+    if notes > edo:
+        raise ValueError(f'{text} does not fit in {edo}-edo')
+    return symbol_to_mask(text, edo, notes != edo)
+
+def parse_scales(scales, edo):
+    if type(scales) == str:
+        scales = scales.split(',')
+    scales = [scale.strip().strip('\'"') for scale in scales]
+    return np.array([parse_chord(scale, edo) for scale in scales if scale], dtype=np.int64)
+
+SCALE_TABLES = {}
+def scale_table(edo, scale_masks, all_keys=True):
+    # fits[m] is true when chord m lies inside one of the scales. each scale is marked, then every
+    # subset of a marked mask is marked one bit at a time, so lookups are a single index.
+    # when not doing all keys, chords are shapes and the scales are taken in every key
+    cache_key = edo, tuple(sorted(set(scale_masks.tolist()))), all_keys
+    if cache_key not in SCALE_TABLES:
+        if not all_keys:
+            scale_masks = np.concatenate([transpose_masks(scale_masks, i, edo) for i in range(edo)])
+        fits = np.zeros(1 << edo, dtype=bool)
+        fits[scale_masks] = True
+        masks = np.arange(1 << edo, dtype=np.int64)
+        for q in range(edo):
+            without = masks[(masks >> q) & 1 == 0]
+            fits[without] |= fits[without | (1 << q)]
+        SCALE_TABLES[cache_key] = fits
+    return SCALE_TABLES[cache_key]
+
+def scale_membership(masks, scale_masks, edo, all_keys=True):
+    # member[i, j] is true when chord j lies inside scale i, every scale checked at once
+    member = np.zeros((len(scale_masks), len(masks)), dtype=bool)
+    for i in range(1 if all_keys else edo):
+        scales = transpose_masks(scale_masks, i, edo)
+        member |= (masks[None, :] & ~scales[:, None]) == 0
+    return member
+
+def move_unions(src, dst, edo, intervals):
+    # a shape arc stands for every chord pair one interval move apart in those two shapes. returns
+    # (arc index, union of the two chords) for each such pair, dst is tried in every key
+    rows, unions = [], []
+    offsets = np.mod(intervals, edo)
+    for i in range(edo):
+        moved = transpose_masks(dst, i, edo)
+        left, arrived = src & ~moved, moved & ~src
+        single = np.flatnonzero((popcount(left, edo) == 1) & (popcount(arrived, edo) == 1))
+        # a move takes pitch q to q - offset
+        offset = (np.log2(left[single]).round() - np.log2(arrived[single]).round()).astype(np.int64) % edo
+        single = single[np.isin(offset, offsets)]
+        rows.append(single)
+        unions.append(src[single] | moved[single])
+    return np.concatenate(rows), np.concatenate(unions)
+
+@tracing.traced()
+def filter_scale_arcs(labels, arcs, edo, scales, all_keys, intervals, truncate=True):
+    # keeps the arcs whose two chords lie inside the same scale, ie their union fits in a scale
+    fits = scale_table(edo, parse_scales(scales, edo), all_keys)
+    arcs = list(arcs)
+    masks = {label: symbol_to_mask(label, edo, truncate) for label in labels}
+    src = np.array([masks[a] for a, _ in arcs], dtype=np.int64)
+    dst = np.array([masks[b] for _, b in arcs], dtype=np.int64)
+    if all_keys:
+        keep = fits[src | dst]
+    else:
+        keep = np.zeros(len(arcs), dtype=bool)
+        rows, unions = move_unions(src, dst, edo, intervals)
+        keep[rows[fits[unions]]] = True
+    arcs = {arc for arc, k in zip(arcs, keep.tolist()) if k}
+    return {label for arc in arcs for label in arc}, arcs
+
+def mask_arc_chunks(edo, chord_sizes, intervals, do_all_keys, add_notes=False, remove_notes=False,
+                    inclusions=False, exclusions=False, include_and=True, exclude_and=False,
+                    flips=False, complements=False, remove_reflections=False, remove_complements=False,
+                    scales=False, unions=False, chunk_size=1 << 15):
+    # nodes are every chord (or chord shape) with a size in chord_sizes = (smallest, largest).
+    # flips and complements add an arc from each chord to its mirror image and to its complement.
+    # remove_reflections and remove_complements merge shapes that are mirrors or complements of
+    # each other into one node, they only apply when not doing all keys.
+    # scales keeps only the arcs whose two chords lie inside the same scale.
+    # yields the node masks first, then deduplicated (source, target) mask arrays chunk by chunk.
+    # with unions the chunks are (source, target, union) and not deduplicated, union is the source
+    # together with the target in the key the move landed in
+    if type(inclusions) == str:
+        inclusions = list(inclusions)
+    if type(exclusions) == str:
+        exclusions = list(exclusions)
+    if type(intervals) == int:
+        intervals = [intervals]
+    smallest, largest = chord_sizes = tuple(chord_sizes)
+    canonical, _ = rotation_table(edo)
+    orbits = orbit_table(edo, remove_reflections, remove_complements, chord_sizes)
 
-# for l in all_unique_binaries(EDO):
-#     for b in l:
-#         b = b[::-1]
-#         b_symbol = binary_to_symbol(b, EDO, SIMPLIFY_SYMBOLS)
-#         if TRUNCATE_SYMBOLS:
-#             try:
-#                 b_symbol = b_symbol.split('.')[0][:-1] + '.' + b_symbol.split('.')[1]
-#             except:
-#                 b_symbol = b_symbol[:-1]
-#         print(b, '\t', b_symbol)
-#     print()
+    if do_all_keys:
+        nodes = np.arange(1 << edo, dtype=np.int64)
+    else:
+        nodes = unique_masks(edo, remove_reflections, remove_complements, chord_sizes)
+    sizes = popcount(nodes, edo)
+    nodes = nodes[(sizes >= max(smallest, 1)) & (sizes <= largest)]
+    if scales:
+        fits = scale_table(edo, parse_scales(scales, edo), do_all_keys)
+        nodes = nodes[fits[nodes]]
+    tracing.count('chords', enumerated=len(nodes))
+    yield nodes
+
+    generating = progress.Stage('generate', len(nodes))
+    for start in range(0, len(nodes), chunk_size):
+        generating.advance(min(chunk_size, len(nodes) - start))
+        chunk = nodes[start:start+chunk_size]
+        # the span stops before the yield, so it doesn't count the time spent by the consumer
+        with tracing.span('arc_chunk', chords=len(chunk)):
+            moves = list(mask_moves(chunk, edo, intervals, add_notes, remove_notes))
+            if flips:
+                moves.append((chunk, reflect_masks(chunk, edo)))
+            if complements:
+                moves.append((chunk, complement_masks(chunk, edo)))
+            src = np.concatenate([m[0] for m in moves])
+            dst = np.concatenate([m[1] for m in moves])
+            produced = len(src)
+            dst_sizes = popcount(dst, edo)
+            in_range = (dst_sizes >= max(smallest, 1)) & (dst_sizes <= largest)
+            src, dst = src[in_range], dst[in_range]
+            # the two chords as they are before the target is reduced to its shape
+            union = src | dst
+            if not do_all_keys:
+                dst = orbits[dst]
+            if scales:
+                keep = fits[union]
+                src, dst, union = src[keep], dst[keep], union[keep]
+            if flips or complements:
+                # symmetric chords are their own mirror image
+                keep = src != dst
+                src, dst, union = src[keep], dst[keep], union[keep]
+            if inclusions or exclusions:
+                keep = shape_filter((canonical[src], canonical[dst]), edo,
+                                    inclusions, exclusions, include_and, exclude_and)
+                src, dst, union = src[keep], dst[keep], union[keep]
+            tracing.count('arcs', produced=produced, filtered=produced - len(src))
+            if unions:
+                arcs = src, dst, union
+            else:
+                keys = sorted_unique((src << edo) | dst)
+                arcs = keys >> edo, keys & ((1 << edo) - 1)
+        yield arcs
+    generating.finish()
+
+def write_mask_net_file(filename, edo, chord_sizes, intervals, do_all_keys, add_notes=False, remove_notes=False,
+                        inclusions=False, exclusions=False, include_and=True, exclude_and=False,
+                        simplify_symbol=False, truncate=True,
+                        flips=False, complements=False, remove_reflections=False, remove_complements=False,
+                        scales=False):
+    # streams arcs to disk chunk by chunk, only the node table is held in memory
+    chunks = mask_arc_chunks(edo, chord_sizes, intervals, do_all_keys, add_notes, remove_notes,
+                             inclusions, exclusions, include_and, exclude_and,
+                             flips, complements, remove_reflections, remove_complements, scales)
+    return write_mask_arcs(filename, edo, next(chunks), chunks, simplify_symbol, truncate)
+
+@tracing.traced()
+def write_mask_arcs(filename, edo, nodes, chunks, simplify_symbol=False, truncate=True, block_size=1 << 16):
+    # chunks yields (source, target) mask arrays, every mask in them has to be in nodes. like the
+    # string pipeline only chords with arcs become vertices, so arcs are spilled to a scratch file
+    # until the vertex list is known
+    index = np.full(1 << edo, -1, dtype=np.int64)
+    index[nodes] = 0
+    used = np.zeros(1 << edo, dtype=bool)
+    num_arcs = 0
+    with tempfile.TemporaryFile() as spill:
+        for src, dst in chunks:
+            if len(src) == 0:
+                continue
+            if (index[src] < 0).any() or (index[dst] < 0).any():
+                raise ValueError('an arc leads to a chord that is not one of the vertices')
+            used[src] = True
+            used[dst] = True
+            np.column_stack([src, dst]).astype(np.int64).tofile(spill)
+            num_arcs += len(src)
+        nodes = nodes[used[nodes]]
+        index[nodes] = np.arange(len(nodes))
+        names = [str(i+1) for i in range(len(nodes))]
+        spill.seek(0)
+        with open(filename, 'w') as file, progress.Stage('write', num_arcs) as writing:
+            file.write(f'%{edo}\n')
+            file.write(f'*Vertices {len(nodes)}\n')
+            for i, label in enumerate(mask_labels(nodes, edo, simplify_symbol, truncate)):
+                file.write(f'{i+1} "{label}" 0.0 0.0 0.0\n')
+            file.write(f'*Arcs \n')
+            while True:
+                arcs = index[np.fromfile(spill, dtype=np.int64, count=2*block_size)].reshape(-1, 2)
+                if len(arcs) == 0:
+                    break
+                file.write('\n'.join([f'{names[a]} {names[b]} 1.0' for a, b in arcs.tolist()]) + '\n')
+                writing.advance(len(arcs))
+    return len(nodes), num_arcs
+
+
+@tracing.traced()
+def generate_graph(settings, filename):
+    # writes the graph for a dict of launcher settings, returns (vertices, arcs)
+    s = settings
+    chord_sizes = s['CHORD_SIZE'] if isinstance(s['CHORD_SIZE'], list) else (s['CHORD_SIZE'], s['CHORD_SIZE'])
+    if s.get('COMPLEMENT_CHORDS') and not any(chord_sizes[0] <= s['EDO'] - size <= chord_sizes[1]
+                                              for size in range(chord_sizes[0], chord_sizes[1]+1)):
+        # the complement of a chord has EDO minus its notes, so a single chord size only gets
+        # complement arcs when it is half the edo
+        raise ValueError(f'complements of {chord_sizes[0]}-{chord_sizes[1]} note chords in {s["EDO"]}-EDO '
+                         f'fall outside the chord sizes, so COMPLEMENT_CHORDS would add no arcs')
+    if s.get('MEMORY_LIMIT'):
+        # bounded memory and no 2^EDO tables, see stream.py
+        from stream import parse_memory, write_settings_graph
+        return write_settings_graph(s, filename, parse_memory(s['MEMORY_LIMIT']))
+    mixed = (isinstance(s['CHORD_SIZE'], list) or s['ADD_REMOVE_NOTES'] or s['FLIP_CHORDS']
+             or s['COMPLEMENT_CHORDS'] or s['REMOVE_REFLECTIONS'] or s['REMOVE_COMPLEMENTS'])
+    if mixed:
+        # chords of every size in the range, with merges (and optionally added and removed notes,
+        # mirror images and complements) as arcs. written straight to disk, the node set can be up to 2^EDO chords.
+        return write_mask_net_file(filename, s['EDO'], chord_sizes, s['INTERVALS'], s['DO_ALL_KEYS'],
+                                   s['ADD_REMOVE_NOTES'], s['ADD_REMOVE_NOTES'], s['INCLUSIONS'], s['EXCLUSIONS'],
+                                   s['INCLUDE_AND'], s['EXCLUDE_AND'], s['SIMPLIFY_SYMBOLS'], s['TRUNCATE_SYMBOLS'],
+                                   s['FLIP_CHORDS'], s['COMPLEMENT_CHORDS'], s['REMOVE_REFLECTIONS'],
+                                   s['REMOVE_COMPLEMENTS'], s['SCALES'])
+    # generates all chord transformations given an interval step, either in all keys or not, then filters them.
+    labels, arcs = generate_transformations(s['EDO'], s['CHORD_SIZE'], s['INTERVALS'], s['DO_ALL_KEYS'],
+                                            s['INCLUSIONS'], s['EXCLUSIONS'], s['INCLUDE_AND'], s['EXCLUDE_AND'],
+                                            s['SIMPLIFY_SYMBOLS'], s['TRUNCATE_SYMBOLS'], s['SCALES'])
+    write_net_file(filename, labels, arcs, s['EDO'])
+    return len(labels), len(arcs)
+
+
+if __name__ == '__main__':
+    import temp_settings
+
+    # EDO = 12
+    # TRUNCATE_SYMBOLS = True
+    # SIMPLIFY_SYMBOLS = True
+
+    # CHORD_SIZE = 2
+    # INTERVALS = [7]
+
+    # DO_ALL_KEYS = True
+
+    # # INCLUSIONS = ['011', '032', '111', '022', '030', '013', '103', '031', '301', '130', '221']
+    # INCLUSIONS = False
+    # # EXCLUSIONS = ['32', '23']
+    # EXCLUSIONS = False
+
+    # INCLUDE_AND = True
+    # EXCLUDE_AND = False
+
+
+    generate_graph(vars(temp_settings), 'src/graph.net')
+
+
+
+
+
+    # chord A  ->  chord B
+    # TRANSFORMATIONS =(\
+    #     ('32', '34'), # Relative
+    #     ('24', '23'), # Leading tone
+    #     ('32', '23'), # Parallel
+    # )
+    # # takes the given chord transformations and transposes them to all keys.
+    # labels, arcs = generate_rotated_instructions(TRANSFORMATIONS, EDO, SIMPLIFY_SYMBOLS, TRUNCATE_SYMBOLS)
+
+
+
+    system('cd src && display_net.py')
+
+
+    # for l in all_unique_binaries(EDO):
+    #     for b in l:
+    #         b = b[::-1]
+    #         b_symbol = binary_to_symbol(b, EDO, SIMPLIFY_SYMBOLS)
+    #         if TRUNCATE_SYMBOLS:
+    #             try:
+    #                 b_symbol = b_symbol.split('.')[0][:-1] + '.' + b_symbol.split('.')[1]
+    #             except:
+    #                 b_symbol = b_symbol[:-1]
+    #         print(b, '\t', b_symbol)
+    #     print()
 
 
 '''
@@ -265,32 +661,12 @@ TODO:
 0. different interval steps per note
     - this is actually more natural in a system where all binaries are treated as unique shapes
 
-1. ability to have edges across different chord sizes, such as when an interval neighbor
-   overlaps with an existing note and the chord size gets reduced by 1.
-3. filter based on scales
-5. highlight all chords that include a specific note
-
-6. allow flipping as a transformation
-7. allow inverting 1's and 0's as a transformation
-8. allow adding and removing notes as a transformation
-
 9. ability to treat all binaries as unique shapes, without regard for the minimum rotation
 
-10. ability to highlight specific chord shapes
-    - list of chord shapes in the graph along with their other notation forms, ie. indexed and binary
-
-10. ability to highlight chords that contain specific notes
-
-11. ability to "invert" a graph you're looking at.
-    - this would be like doing the operation (entire set) NOT (graph in question)
-        - boolean logic on graphs
-
-- ability to remove reflections of chords
+10. list of chord shapes in the graph along with their other notation forms, ie. indexed and binary
 
 - change other functions so all_unique_binaries() is simpler
 
-- list of interval combinations that take you from chord A to chord B
-
 9. third program.
     - catalog of all graphs
     - interface for selecting:
@@ -0,0 +1,86 @@
+import os
+import math
+import importlib.util
+
+# closed form graph sizes for the launcher, nothing is enumerated so it is instant for any edo.
+# chord counts are exact before filtering, arc counts are upper bounds
+
+# seconds per pair of nodes per iteration of apply_spring_layout_nd for each kernels.py backend,
+# measured on a 220 node graph
+PAIR_SECONDS = {'numba': 3e-8, 'numpy': 1.2e-7}
+LAYOUT_BUDGET = 60
+
+def divisors(n):
+    return [d for d in range(1, n + 1) if n % d == 0]
+
+def totient(n):
+    return sum(1 for i in range(1, n + 1) if math.gcd(i, n) == 1)
+
+def necklaces(edo, size):
+    # chord shapes with this many notes, ie. binary necklaces counted with burnside's lemma: a shape
+    # fixed by a rotation of order d repeats every edo/d steps
+    if size == 0 or size == edo:
+        return 1
+    g = math.gcd(edo, size)
+    return sum(totient(d) * math.comb(edo // d, size // d) for d in divisors(g)) // edo
+
+def chord_count(edo, size, all_keys):
+    return math.comb(edo, size) if all_keys else necklaces(edo, size)
+
+def move_count(edo, size, intervals):
+    # chord to chord moves in all keys: a note at q moving to the empty q - offset, and the other
+    # notes anywhere else, for every interval that isn't a whole octave
+    steps = len({i % edo for i in intervals} - {0})
+    return steps * edo * math.comb(edo - 2, size - 1) if 0 < size < edo else 0
+
+def merge_count(edo, size, intervals):
+    # chord to smaller chord moves in all keys: a note at q moving onto q - offset, which the chord
+    # already has. intervals that merge the same note into different notes give the same arc, so
+    # with more than one interval this is a bound
+    steps = len({i % edo for i in intervals} - {0})
+    return steps * edo * math.comb(edo - 2, size - 2) if 1 < size <= edo else 0
+
+def estimate_graph(edo, chord_sizes, intervals, all_keys, iterations, add_remove_notes=False,
+                   flips=False, complements=False):
+    # returns (chords, arcs bound, layout seconds bound). with reflections or complements removed
+    # there are fewer shapes than this
+    smallest, largest = chord_sizes
+    chords = arcs = 0
+    for size in range(max(smallest, 1), min(largest, edo) + 1):
+        count = chord_count(edo, size, all_keys)
+        chords += count
+        moves = move_count(edo, size, intervals)
+        if size - 1 >= max(smallest, 1):
+            # the merged chord is only a node when its size is in the range too
+            moves += merge_count(edo, size, intervals)
+        if not all_keys:
+            # a shape has at most one arc per note and interval
+            moves = min(moves, count * size * len(intervals))
+        # plus one arc for every added or removed note, the mirror image and the complement
+        arcs += moves + count * ((edo if add_remove_notes else 0) + int(flips) + int(complements))
+    # every pair of nodes repels each iteration, so a single component of every chord is the worst case
+    seconds = iterations * (chords * (chords - 1) / 2 + arcs) * PAIR_SECONDS[layout_backend()]
+    return chords, arcs, seconds
+
+def layout_backend():
+    # the backend kernels.py picks, without importing numba into the launcher
+    default = 'numba' if importlib.util.find_spec('numba') else 'numpy'
+    backend = os.environ.get('EDO_GRAPHS_BACKEND', default)
+    return backend if backend in PAIR_SECONDS else 'numpy'
+
+def duration_text(seconds):
+    if seconds < 60:
+        return f'{seconds:.0f}s'
+    if seconds < 3600:
+        return f'{seconds / 60:.0f}m'
+    if seconds < 86400:
+        return f'{seconds / 3600:.0f}h'
+    return f'{seconds / 86400:.0f}d'
+
+def count_text(n):
+    if n < 1000:
+        return str(n)
+    for unit, scale in (('k', 1e3), ('M', 1e6), ('G', 1e9)):
+        if n < scale * 1000:
+            return f'{n / scale:.3g}{unit}'
+    return f'{n:.2g}'
@@ -0,0 +1,73 @@
+import warnings
+import networkx as nx
+from networkx.algorithms.isomorphism import DiGraphMatcher
+
+WL_ITERATIONS = 3
+
+def chord_size(label):
+    # number of gap digits in the shape part; the same for every node of one chord size,
+    # whether or not symbols are truncated
+    return len(str(label).split('.')[0])
+
+def build_graph(labels, arcs):
+    G = nx.DiGraph()
+    G.add_nodes_from((label, {'size': chord_size(label)}) for label in labels)
+    G.add_edges_from(arcs)
+    return G
+
+def wl_hash(G):
+    features = {node: f'{chord_size(node)}:{G.in_degree(node)}:{G.out_degree(node)}' for node in G.nodes()}
+    nx.set_node_attributes(G, features, 'feature')
+    with warnings.catch_warnings():
+        # networkx warns that directed hashes changed in 3.5; hashes are only compared within one catalog
+        warnings.simplefilter('ignore', UserWarning)
+        return nx.weisfeiler_lehman_graph_hash(G, node_attr='feature', iterations=WL_ITERATIONS)
+
+def degree_profile(G):
+    # profile[d-1] is the number of nodes with undirected degree of at least d
+    degrees = [d for _, d in G.to_undirected(as_view=True).degree()]
+    counts = [0] * (max(degrees, default=0) + 1)
+    for d in degrees:
+        counts[d] += 1
+    profile = []
+    at_least = 0
+    for count in counts[:0:-1]:
+        at_least += count
+        profile.append(at_least)
+    return profile[::-1]
+
+def size_profile(G):
+    sizes = {}
+    for node in G.nodes():
+        size = chord_size(node)
+        sizes[size] = sizes.get(size, 0) + 1
+    return sizes
+
+def fingerprint(G):
+    profile = degree_profile(G)
+    return {
+        'wl_hash': wl_hash(G),
+        'max_degree': len(profile),
+        'degree_profile': profile,
+        'size_profile': size_profile(G),
+    }
+
+def may_contain(big, small):
+    # necessary conditions for `small` to embed in `big`, both fingerprints with vertex and edge counts
+    if small['vertices'] > big['vertices'] or small['edges'] > big['edges']:
+        return False
+    if small['max_degree'] > big['max_degree']:
+        return False
+    if any(s > b for s, b in zip(small['degree_profile'], big['degree_profile'])):
+        return False
+    big_sizes = {int(k): v for k, v in big['size_profile'].items()}
+    return all(v <= big_sizes.get(int(k), 0) for k, v in small['size_profile'].items())
+
+def same_size(a, b):
+    return a['size'] == b['size']
+
+def is_isomorphic(G1, G2):
+    return nx.is_isomorphic(G1, G2, node_match=same_size)
+
+def contains_subgraph(G, H):
+    return DiGraphMatcher(G, H, node_match=same_size).subgraph_is_monomorphic()
@@ -0,0 +1,148 @@
+import sys
+import time
+import argparse
+import numpy as np
+from edo_graphs import (CHAR_TO_VALUE, base62_to_int, mask_arc_chunks, popcount, sorted_unique, symbol_to_mask,
+                        write_mask_arcs)
+
+# a graph is a sorted array of unique int64 edge keys, source << edo | target, where chords are
+# masks with bit q as pitch class q. every graph over one edo shares that node id space, so
+# boolean operations are merges of sorted arrays and never touch labels.
+
+def edge_keys(src, dst, edo):
+    return sorted_unique((np.asarray(src, dtype=np.int64) << edo) | np.asarray(dst, dtype=np.int64))
+
+def split_keys(keys, edo):
+    return keys >> edo, keys & ((1 << edo) - 1)
+
+def contains(keys, values):
+    # which of values are in the sorted array keys
+    if len(keys) == 0:
+        return np.zeros(len(values), dtype=bool)
+    index = np.minimum(np.searchsorted(keys, values), len(keys) - 1)
+    return keys[index] == values
+
+def merge(a, b):
+    # a stable sort finds the two sorted runs and merges them in one pass
+    merged = np.sort(np.concatenate([a, b]), kind='stable')
+    return merged, merged[1:] == merged[:-1]
+
+def union(a, b):
+    merged, repeated = merge(a, b)
+    keep = np.ones(len(merged), dtype=bool)
+    keep[1:] = ~repeated
+    return merged[keep]
+
+def intersection(a, b):
+    merged, repeated = merge(a, b)
+    return merged[1:][repeated]
+
+def difference(a, b):
+    return a[~contains(b, a)]
+
+def symmetric_difference(a, b):
+    return union(difference(a, b), difference(b, a))
+
+def complement(a, universe):
+    return difference(universe, a)
+
+OPERATIONS = {
+    'union': union,
+    'intersection': intersection,
+    'difference': difference,
+    'xor': symmetric_difference,
+}
+
+def universe_keys(edo, chord_sizes, intervals, do_all_keys, add_remove_notes=False):
+    # every transition for these parameters before any filtering
+    chunks = mask_arc_chunks(edo, chord_sizes, intervals, do_all_keys, add_remove_notes, add_remove_notes)
+    next(chunks)
+    keys = [(src << edo) | dst for src, dst in chunks]
+    return sorted_unique(np.concatenate(keys)) if keys else np.zeros(0, dtype=np.int64)
+
+def is_truncated(label, edo):
+    # a full symbol's gaps and notes add up to the edo
+    chord = label.split('.')[0]
+    if any(c not in CHAR_TO_VALUE for c in chord):
+        raise ValueError(f'"{label}" is not a chord symbol')
+    return len(chord) + sum(base62_to_int(c) for c in chord) != edo
+
+def read_edges(filename):
+    # returns (edge keys, edo, simplify_symbol, truncate, all_keys), the last three describe how the
+    # graph was written. a reduced graph labels every shape in key 0, a graph in all keys has other keys
+    with open(filename, 'r') as file:
+        edo = int(file.readline().strip()[1:])
+        num_labels = int(file.readline().split()[1])
+        labels = [file.readline().split('"')[1] for _ in range(num_labels)]
+        file.readline()
+        numbers = np.array(file.read().split(), dtype=float).reshape(-1, 3)[:, :2].astype(np.int64) - 1
+    truncated = [is_truncated(label, edo) for label in labels]
+    masks = np.array([symbol_to_mask(label, edo, t) for label, t in zip(labels, truncated)], dtype=np.int64)
+    simplify = any('.' not in label for label in labels)
+    all_keys = any(label.partition('.')[2] not in ('', '0') for label in labels)
+    return edge_keys(masks[numbers[:, 0]], masks[numbers[:, 1]], edo), edo, simplify, any(truncated), all_keys
+
+def write_edges(filename, keys, edo, simplify_symbol=False, truncate=True):
+    src, dst = split_keys(keys, edo)
+    nodes = sorted_unique(np.concatenate([src, dst]))
+    return write_mask_arcs(filename, edo, nodes, [(src, dst)], simplify_symbol, truncate)
+
+def main():
+    parser = argparse.ArgumentParser(description='boolean operations on graphs over the same edo')
+    parser.add_argument('operation', choices=[*OPERATIONS, 'complement'])
+    parser.add_argument('files', nargs='+', help='.net files, operations are applied left to right')
+    parser.add_argument('-o', '--output', default='graph.net')
+    parser.add_argument('--universe', help='.net file to complement against, instead of generating one')
+    parser.add_argument('-i', '--intervals', help='intervals of the generated universe, like 1,3')
+    parser.add_argument('--add-remove', action='store_true', help='generated universe adds and removes notes')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        graphs = [read_edges(f) for f in args.files]
+    except (OSError, ValueError) as e:
+        print(f'error: {e}')
+        sys.exit(1)
+    edo, simplify, truncate, all_keys = graphs[0][1:]
+    if any(g[1] != edo for g in graphs):
+        print(f'error: every graph has to be over the same edo')
+        sys.exit(1)
+    if any(g[4] != all_keys for g in graphs):
+        print(f'error: graphs in all keys and reduced graphs can not be combined')
+        sys.exit(1)
+    read_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if args.operation == 'complement':
+        if len(graphs) != 1:
+            print(f'error: complement takes one graph')
+            sys.exit(1)
+        if args.universe:
+            universe, universe_edo, _, _, universe_all_keys = read_edges(args.universe)
+            if universe_edo != edo or universe_all_keys != all_keys:
+                print(f'error: the universe has to be over the same edo, and in all keys if the graph is')
+                sys.exit(1)
+        elif args.intervals is None:
+            print(f'error: complement needs the intervals of the universe (-i) or a --universe file')
+            sys.exit(1)
+        else:
+            # the universe covers the chord sizes found in the graph, in all keys if the graph is
+            src, dst = split_keys(graphs[0][0], edo)
+            sizes = popcount(np.concatenate([src, dst]), edo)
+            intervals = [int(i) for i in args.intervals.split(',')]
+            universe = universe_keys(edo, (int(sizes.min()), int(sizes.max())), intervals, all_keys,
+                                     args.add_remove)
+        result = complement(graphs[0][0], universe)
+    else:
+        operation = OPERATIONS[args.operation]
+        result = graphs[0][0]
+        for keys, *_ in graphs[1:]:
+            result = operation(result, keys)
+    operation_time = time.perf_counter() - start
+
+    nodes, arcs = write_edges(args.output, result, edo, simplify, truncate)
+    print(f'{args.output}: {nodes} vertices, {arcs} edges '
+          f'(read {read_time*1000:.1f} ms, {args.operation} {operation_time*1000:.1f} ms)')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+import csv
+import time
+import numpy as np
+import pygame
+
+# frame timings for the viewer's overlay. the viewer fills in current during a frame and calls
+# record at the end of it, the last HISTORY frames are kept in a ring
+HISTORY = 600
+# project, edges and labels come from draw_graph, other is events, the camera, the panel and the
+# overlay itself, and wait is the time clock.tick sleeps to hold the frame rate
+COLUMNS = ('project', 'edges', 'labels', 'flip', 'other', 'wait', 'frame')
+# frames averaged for the numbers in the overlay
+AVERAGE = 30
+
+GRAPH_WIDTH = 150
+GRAPH_HEIGHT = 40
+PADDING = 4
+
+WHITE = (255, 255, 255)
+DARK_GRAY = (50, 50, 50)
+GREEN = (90, 200, 90)
+RED = (220, 80, 80)
+
+class FrameTimes:
+    def __init__(self, history=HISTORY):
+        self.times = np.zeros((history, len(COLUMNS)))
+        self.count = 0
+        self.current = dict.fromkeys(COLUMNS, 0.0)
+        self.last = time.perf_counter()
+
+    def record(self):
+        now = time.perf_counter()
+        frame = now - self.last
+        self.last = now
+        c = self.current
+        c['frame'] = frame
+        c['other'] = max(0.0, frame - c['project'] - c['edges'] - c['labels'] - c['flip'] - c['wait'])
+        self.times[self.count % len(self.times)] = [c[name] for name in COLUMNS]
+        self.count += 1
+        self.current = dict.fromkeys(COLUMNS, 0.0)
+
+    def history(self):
+        # the kept frames, oldest first
+        if self.count <= len(self.times):
+            return self.times[:self.count]
+        return np.roll(self.times, -(self.count % len(self.times)), axis=0)
+
+    def write_csv(self, path):
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['frame'] + [f'{name}_ms' for name in COLUMNS])
+            first = self.count - len(self.history())
+            for i, row in enumerate(self.history()):
+                writer.writerow([first + i] + [f'{t*1000:.3f}' for t in row])
+
+def draw_fps_graph(screen, rect, frames, target_fps):
+    # one column per frame, green at or above the target frame rate and red below it
+    pygame.draw.rect(screen, DARK_GRAY, rect)
+    fps = 1 / np.maximum(frames[-rect.width:], 1e-6)
+    top = 2 * target_fps
+    for x, value in enumerate(fps.tolist()):
+        height = int(min(value, top) / top * rect.height)
+        color = GREEN if value >= target_fps * 0.95 else RED
+        pygame.draw.line(screen, color, (rect.x + x, rect.bottom - 1), (rect.x + x, rect.bottom - height))
+    target_y = rect.bottom - rect.height // 2
+    pygame.draw.line(screen, WHITE, (rect.x, target_y), (rect.right - 1, target_y))
+
+def draw_hud(screen, font, frame_times, nodes, edges, target_fps, right, top):
+    frames = frame_times.history()
+    if len(frames) == 0:
+        return
+    recent = frames[-AVERAGE:].mean(axis=0) * 1000
+    times = dict(zip(COLUMNS, recent))
+    lines = [f"{1000 / times['frame']:5.1f} fps {times['frame']:6.2f} ms"]
+    lines += [f'{name:<8}{times[name]:6.2f} ms' for name in COLUMNS[:-1]]
+    lines.append(f'{nodes} nodes {edges} edges')
+
+    line_height = font.get_linesize()
+    width = max(GRAPH_WIDTH, max(font.size(line)[0] for line in lines)) + 2*PADDING
+    height = len(lines) * line_height + GRAPH_HEIGHT + 3*PADDING
+    panel = pygame.Rect(right - width, top, width, height)
+    pygame.draw.rect(screen, (0, 0, 0), panel)
+    for i, line in enumerate(lines):
+        screen.blit(font.render(line, False, WHITE), (panel.x + PADDING, panel.y + PADDING + i*line_height))
+    graph = pygame.Rect(panel.x + PADDING, panel.bottom - PADDING - GRAPH_HEIGHT, width - 2*PADDING, GRAPH_HEIGHT)
+    draw_fps_graph(screen, graph, frames[:, COLUMNS.index('frame')], target_fps)
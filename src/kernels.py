@@ -0,0 +1,173 @@
+import os
+import math
+import numpy as np
+
+# the hot loops, each written twice: with numpy, and as a numba kernel compiled in nopython mode
+# with parallel loops over chords or nodes. numba is optional, the numpy versions are used when it
+# isn't installed or when EDO_GRAPHS_BACKEND=numpy. both versions do the same floating point
+# operations in the same order (sums run one term at a time, never pairwise), so they give
+# identical results and share cached layouts
+try:
+    import numba
+except ImportError:
+    numba = None
+
+BACKEND = os.environ.get('EDO_GRAPHS_BACKEND', 'numba' if numba is not None else 'numpy')
+if BACKEND == 'numba' and numba is None:
+    print('warning: EDO_GRAPHS_BACKEND is numba but numba is not installed, using numpy')
+    BACKEND = 'numpy'
+
+# rows of the pairwise repulsion computed at once by the numpy layout, bounds its memory
+LAYOUT_BLOCK = 1 << 20
+
+def smallest_rotations_numpy(masks, edo):
+    # smallest transposition of each mask, and the key it has to be transposed up by to get back
+    full = (1 << edo) - 1
+    canonical = masks.copy()
+    key = np.zeros(len(masks), dtype=np.int64)
+    for i in range(1, edo):
+        down = ((masks >> i) | (masks << (edo - i))) & full
+        better = down < canonical
+        canonical[better] = down[better]
+        key[better] = i
+    return canonical, key
+
+def squared_lengths(columns):
+    # sum of squares of a list of coordinate arrays, added in order
+    total = columns[0] * columns[0]
+    for c in columns[1:]:
+        total = total + c * c
+    return total
+
+def farthest_point_numpy(points, center):
+    # index of the point farthest from center (the first one on a tie) and its distance
+    distances = np.sqrt(squared_lengths([points[:, d] - center[d] for d in range(points.shape[1])]))
+    farthest = int(np.argmax(distances))
+    return farthest, distances[farthest]
+
+def spring_step_numpy(pos, src, dst, k, t, rows=None):
+    # one fruchterman-reingold step of apply_spring_layout_nd, moves pos in place. every pair of
+    # nodes repels, every edge (src[e], dst[e]) attracts, and no node moves further than t.
+    # with rows only those nodes get forces and move, the others are placed by the caller
+    n, dimensions = pos.shape
+    if rows is None:
+        rows = np.arange(n)
+    disp = np.zeros((n, dimensions))
+    block_size = max(1, LAYOUT_BLOCK // max(n, 1))
+    for start in range(0, len(rows), block_size):
+        block = rows[start:start + block_size]
+        delta = [pos[block, d, None] - pos[None, :, d] for d in range(dimensions)]
+        dist = np.sqrt(squared_lengths(delta))
+        apart = dist != 0
+        safe = np.where(apart, dist, 1.0)
+        factor = k * k / safe
+        for d in range(dimensions):
+            force = np.where(apart, delta[d] / safe * factor, 0.0)
+            # accumulate runs along each row one term at a time
+            disp[block, d] = np.add.accumulate(force, axis=1)[:, -1]
+
+    delta = [pos[src, d] - pos[dst, d] for d in range(dimensions)]
+    dist = np.sqrt(squared_lengths(delta))
+    apart = dist != 0
+    safe = np.where(apart, dist, 1.0)
+    factor = safe * safe / k
+    for d in range(dimensions):
+        force = np.where(apart, delta[d] / safe * factor, 0.0)
+        # ufunc.at applies the edges one at a time in order
+        np.subtract.at(disp[:, d], src, force)
+        np.add.at(disp[:, d], dst, force)
+
+    length = np.sqrt(squared_lengths([disp[rows, d] for d in range(dimensions)]))
+    moving = length != 0
+    step = np.minimum(length[moving], t)
+    for d in range(dimensions):
+        pos[rows[moving], d] += disp[rows[moving], d] / length[moving] * step
+
+if numba is not None:
+    @numba.njit(parallel=True, cache=True)
+    def smallest_rotations_numba(masks, edo):
+        full = (1 << edo) - 1
+        canonical = masks.copy()
+        key = np.zeros(len(masks), dtype=np.int64)
+        for m in numba.prange(len(masks)):
+            mask = masks[m]
+            for i in range(1, edo):
+                down = ((mask >> i) | (mask << (edo - i))) & full
+                if down < canonical[m]:
+                    canonical[m] = down
+                    key[m] = i
+        return canonical, key
+
+    @numba.njit(cache=True)
+    def farthest_point_numba(points, center):
+        farthest, distance = 0, -1.0
+        for i in range(points.shape[0]):
+            x = points[i, 0] - center[0]
+            total = x * x
+            for d in range(1, points.shape[1]):
+                x = points[i, d] - center[d]
+                total = total + x * x
+            length = math.sqrt(total)
+            if length > distance:
+                farthest, distance = i, length
+        return farthest, distance
+
+    def spring_step_numba(pos, src, dst, k, t, rows=None):
+        spring_rows_numba(pos, src, dst, k, t, np.arange(len(pos)) if rows is None else rows)
+
+    @numba.njit(parallel=True, cache=True)
+    def spring_rows_numba(pos, src, dst, k, t, rows):
+        n, dimensions = pos.shape
+        disp = np.zeros((n, dimensions))
+        for r in numba.prange(len(rows)):
+            i = rows[r]
+            acc = np.zeros(dimensions)
+            for j in range(n):
+                x = pos[i, 0] - pos[j, 0]
+                total = x * x
+                for d in range(1, dimensions):
+                    x = pos[i, d] - pos[j, d]
+                    total = total + x * x
+                dist = math.sqrt(total)
+                if dist != 0:
+                    factor = k * k / dist
+                    for d in range(dimensions):
+                        acc[d] += (pos[i, d] - pos[j, d]) / dist * factor
+            disp[i] = acc
+
+        forces = np.zeros((len(src), dimensions))
+        for e in numba.prange(len(src)):
+            x = pos[src[e], 0] - pos[dst[e], 0]
+            total = x * x
+            for d in range(1, dimensions):
+                x = pos[src[e], d] - pos[dst[e], d]
+                total = total + x * x
+            dist = math.sqrt(total)
+            if dist != 0:
+                for d in range(dimensions):
+                    forces[e, d] = (pos[src[e], d] - pos[dst[e], d]) / dist * (dist * dist / k)
+        for d in range(dimensions):
+            for e in range(len(src)):
+                disp[src[e], d] -= forces[e, d]
+            for e in range(len(src)):
+                disp[dst[e], d] += forces[e, d]
+
+        for r in numba.prange(len(rows)):
+            i = rows[r]
+            total = disp[i, 0] * disp[i, 0]
+            for d in range(1, dimensions):
+                total = total + disp[i, d] * disp[i, d]
+            length = math.sqrt(total)
+            if length != 0:
+                step = min(length, t)
+                for d in range(dimensions):
+                    pos[i, d] += disp[i, d] / length * step
+
+if BACKEND == 'numba':
+    smallest_rotations = smallest_rotations_numba
+    farthest_point = farthest_point_numba
+    spring_step = spring_step_numba
+else:
+    smallest_rotations = smallest_rotations_numpy
+    farthest_point = farthest_point_numpy
+    spring_step = spring_step_numpy
@@ -0,0 +1,116 @@
+import os
+import sys
+import hashlib
+import numpy as np
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'layouts')
+MAX_ENTRIES = 2000
+MAX_BYTES = 512 * 1024 * 1024
+
+# bump the version whenever apply_spring_layout_nd changes, so old cached layouts are not reused
+LAYOUT_ALGORITHM = 'spring_nd'
+LAYOUT_VERSION = 2
+
+stats = {'hits': 0, 'misses': 0}
+
+def graph_key(G, dimensions, iterations, seed, algorithm=LAYOUT_ALGORITHM, version=LAYOUT_VERSION, initial=None,
+              start=0):
+    # canonical over node labels and edge structure, independent of the order networkx stores them in.
+    # a layout started from initial positions (in G.nodes() order) at iteration start is keyed on them as well
+    h = hashlib.sha1(f'{algorithm} {version} {dimensions} {iterations} {seed}\n'.encode())
+    nodes = [str(n) for n in G.nodes()]
+    for node in sorted(nodes):
+        h.update(f'{node}\n'.encode())
+    if initial is not None:
+        order = sorted(range(len(nodes)), key=lambda i: nodes[i])
+        h.update(np.ascontiguousarray(np.asarray(initial, dtype=float)[order]).tobytes())
+        if start:
+            h.update(f'{start}\n'.encode())
+    h.update(b'*\n')
+    for a, b in sorted((str(a), str(b)) for a, b in G.edges()):
+        h.update(f'{a} {b}\n'.encode())
+    return h.hexdigest()
+
+def entry_path(key):
+    return os.path.join(CACHE_DIR, f'{key}.npy')
+
+def load(key, nodes):
+    # positions are stored in sorted label order and returned in the order of `nodes`
+    path = entry_path(key)
+    try:
+        stored = np.load(path)
+    except (OSError, ValueError):
+        stats['misses'] += 1
+        return None
+    nodes = [str(n) for n in nodes]
+    if len(stored) != len(nodes):
+        stats['misses'] += 1
+        return None
+    os.utime(path)
+    stats['hits'] += 1
+    order = {node: i for i, node in enumerate(sorted(nodes))}
+    return stored[[order[node] for node in nodes]]
+
+def store(key, nodes, positions):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    nodes = [str(n) for n in nodes]
+    order = sorted(range(len(nodes)), key=lambda i: nodes[i])
+    path = entry_path(key)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as file:
+        np.save(file, np.asarray(positions)[order])
+    os.replace(temp_path, path)
+    evict()
+
+def write_positions(path, positions, done, graphs):
+    # a positions file: raw layout positions by label, how many iterations each chord's layout has run
+    # and the graph_key of its component. an interrupted write leaves the old file
+    labels = sorted(positions)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as file:
+        np.savez(file, labels=np.array(labels, dtype=str),
+                 positions=np.array([positions[label] for label in labels], dtype=float),
+                 done=np.array([done[label] for label in labels], dtype=np.int64),
+                 graphs=np.array([graphs[label] for label in labels], dtype=str))
+    os.replace(temp_path, path)
+
+def read_positions(path):
+    # the dicts write_positions was given
+    try:
+        with np.load(path) as data:
+            labels = [str(label) for label in data['labels']]
+            return (dict(zip(labels, data['positions'])), dict(zip(labels, data['done'].tolist())),
+                    dict(zip(labels, [str(g) for g in data['graphs']])))
+    except (KeyError, ValueError, EOFError):
+        raise ValueError(f'{path} is not a positions file')
+
+def entries():
+    if not os.path.isdir(CACHE_DIR):
+        return []
+    found = []
+    for name in os.listdir(CACHE_DIR):
+        if name.endswith('.npy'):
+            st = os.stat(os.path.join(CACHE_DIR, name))
+            found.append((st.st_mtime, st.st_size, name))
+    return sorted(found)
+
+def evict(max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+    # least recently used first; loads touch the file, so mtime is the last use
+    found = entries()
+    total = sum(size for _, size, _ in found)
+    while found and (len(found) > max_entries or total > max_bytes):
+        _, size, name = found.pop(0)
+        try:
+            os.remove(os.path.join(CACHE_DIR, name))
+        except OSError:
+            pass
+        total -= size
+
+def clear():
+    evict(0, 0)
+
+if __name__ == '__main__':
+    if '--clear' in sys.argv[1:]:
+        clear()
+    found = entries()
+    print(f'{len(found)} layouts, {sum(size for _, size, _ in found) / 1024**2:.1f} MB in {CACHE_DIR}')
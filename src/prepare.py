@@ -0,0 +1,42 @@
+import os
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = 'hide'
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import sys
+import argparse
+import pygame
+from display_net import DIMENSIONS, ITERATIONS, get_margin_size, prepare_graph, read_edo, read_net_file
+
+# lays out every component of a graph ahead of time and keeps the raw positions in a positions file,
+# saved every CHECKPOINT_EVERY iterations. to continue a run that was interrupted or was too short,
+# run it again with the file as --previous (and more --iterations). a graph made with slightly
+# different settings starts from the positions of the chords it shares with the file
+#   python prepare.py graph.net positions.npz -i 2000
+#   python prepare.py graph.net positions.npz -p positions.npz -i 5000
+
+def main():
+    parser = argparse.ArgumentParser(description='lay out a graph with checkpoints, resuming from earlier positions')
+    parser.add_argument('file', help='.net file to lay out')
+    parser.add_argument('positions', help='positions file to save to')
+    parser.add_argument('-p', '--previous', help='positions file to start from, can be the same file')
+    parser.add_argument('-i', '--iterations', type=int, default=ITERATIONS)
+    parser.add_argument('-d', '--dimensions', type=int, default=DIMENSIONS)
+    parser.add_argument('--symmetric', action='store_true', help='lay out components made in all keys symmetrically')
+    args = parser.parse_args()
+
+    if args.dimensions <= 1:
+        print(f'error: dimensions must be greater than 1')
+        sys.exit(1)
+
+    pygame.init()
+    try:
+        G = read_net_file(args.file)
+        edo = read_edo(args.file) if args.symmetric else None
+        components = prepare_graph(G, get_margin_size(G), args.iterations, args.dimensions, edo,
+                                   args.previous, args.positions)
+    except (ValueError, OSError) as e:
+        print(f'error: {e}')
+        sys.exit(1)
+    print(f'{len(components)} components saved to {args.positions}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+import os
+import json
+import time
+
+# structured progress events for the launcher, one json line each on stdout:
+#   {"event": "progress", "stage": "layout", "done": 120, "total": 500, "elapsed": 3.1, "eta": 9.8}
+# events are start, progress (at most every INTERVAL seconds) and end. they are only sent when
+# EDO_GRAPHS_PROGRESS=json, otherwise a stage is a counter and nothing else
+ENABLED = os.environ.get('EDO_GRAPHS_PROGRESS') == 'json'
+INTERVAL = 0.1
+
+# added to every event, the worker puts the job id here
+context = {}
+
+def emit(message):
+    print(json.dumps({**context, **message}), flush=True)
+
+class Stage:
+    def __init__(self, name, total=None):
+        self.name = name
+        self.total = total
+        self.done = 0
+        self.start = time.perf_counter()
+        self.last = self.start
+        if ENABLED:
+            self.event('start')
+
+    def event(self, kind):
+        elapsed = time.perf_counter() - self.start
+        eta = None
+        if self.total and self.done:
+            eta = elapsed * (self.total - self.done) / self.done
+        emit({'event': kind, 'stage': self.name, 'done': self.done, 'total': self.total,
+              'elapsed': elapsed, 'eta': eta})
+
+    def advance(self, n=1):
+        self.done += n
+        if ENABLED and time.perf_counter() - self.last >= INTERVAL:
+            self.last = time.perf_counter()
+            self.event('progress')
+
+    def finish(self):
+        if ENABLED:
+            self.event('end')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.finish()
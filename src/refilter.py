@@ -0,0 +1,78 @@
+import numpy as np
+import networkx as nx
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from edo_graphs import mask_arc_chunks, mask_labels, passes_filters, rotation_table, shape_symbol, sorted_unique
+
+def parse_filter(text):
+    # comma separated shapes, a leading & or | sets whether both chords of an arc have to pass
+    text = text.strip()
+    both = None
+    if text[:1] in ('&', '|'):
+        both, text = text[0] == '&', text[1:]
+    shapes = [s.strip() for s in text.split(',') if s.strip()]
+    return shapes or False, both
+
+class FilteredGraph:
+    # the unfiltered graph for one set of settings, held as arrays. inclusions and exclusions are
+    # decided once per pair of shapes and applied to the arcs as a boolean mask, so refiltering never
+    # regenerates or rereads anything
+    def __init__(self, edo, chord_sizes, intervals, do_all_keys, simplify_symbol=False, truncate=True, **options):
+        self.edo = edo
+        chunks = mask_arc_chunks(edo, chord_sizes, intervals, do_all_keys, **options)
+        nodes = next(chunks)
+        arcs = list(chunks)
+        src = np.concatenate([a[0] for a in arcs]) if arcs else np.zeros(0, dtype=np.int64)
+        dst = np.concatenate([a[1] for a in arcs]) if arcs else np.zeros(0, dtype=np.int64)
+        self.src = np.searchsorted(nodes, src)
+        self.dst = np.searchsorted(nodes, dst)
+        self.labels = mask_labels(nodes, edo, simplify_symbol, truncate)
+
+        # filters look at full shape symbols, like passes_filters in generate_transformations
+        shapes = rotation_table(edo)[0][nodes]
+        self.shapes = sorted_unique(shapes)
+        shape_ids = np.searchsorted(self.shapes, shapes)
+        pairs = shape_ids[self.src] * len(self.shapes) + shape_ids[self.dst]
+        self.pairs = sorted_unique(pairs)
+        self.pair_ids = np.searchsorted(self.pairs, pairs)
+        self.symbols = [shape_symbol(int(m), edo) for m in self.shapes]
+
+    def arc_mask(self, inclusions=False, exclusions=False, include_and=True, exclude_and=False):
+        if not inclusions and not exclusions:
+            return np.ones(len(self.src), dtype=bool)
+        n = len(self.shapes)
+        keep = np.array([passes_filters(self.symbols[p // n], self.symbols[p % n],
+                                        inclusions, exclusions, include_and, exclude_and)
+                         for p in self.pairs.tolist()], dtype=bool)
+        return keep[self.pair_ids]
+
+    def components(self, keep, min_nodes=3):
+        # [(node indices, arc indices)] of the weakly connected components left by the kept arcs,
+        # largest first like find_components. chords without a kept arc are dropped
+        src, dst = self.src[keep], self.dst[keep]
+        n = len(self.labels)
+        adjacency = coo_matrix((np.ones(len(src), dtype=np.int8), (src, dst)), shape=(n, n))
+        _, component = connected_components(adjacency, directed=True, connection='weak')
+        used = np.zeros(n, dtype=bool)
+        used[src] = True
+        used[dst] = True
+        used_nodes = np.flatnonzero(used)
+        order = used_nodes[np.argsort(component[used_nodes], kind='stable')]
+        groups = np.split(order, np.flatnonzero(np.diff(component[order])) + 1)
+        groups = sorted((g for g in groups if len(g) >= min_nodes), key=len, reverse=True)
+
+        arcs = np.flatnonzero(keep)
+        arcs = arcs[np.argsort(component[self.src[arcs]], kind='stable')]
+        arc_components = component[self.src[arcs]]
+        result = []
+        for nodes in groups:
+            start, end = np.searchsorted(arc_components, [component[nodes[0]], component[nodes[0]] + 1])
+            result.append((nodes, arcs[start:end]))
+        return result
+
+    def subgraph(self, nodes, arcs):
+        G = nx.MultiDiGraph()
+        G.add_nodes_from(self.labels[i] for i in nodes.tolist())
+        G.add_edges_from((self.labels[a], self.labels[b]) for a, b in zip(self.src[arcs].tolist(),
+                                                                           self.dst[arcs].tolist()))
+        return G
@@ -0,0 +1,127 @@
+import os
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = 'hide'
+# no window is ever opened, so this also works on machines without a display
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import sys
+import math
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pygame
+from PIL import Image
+from camera import Camera
+from display_net import (WINDOW_SIZE, FONT_PATH, DIMENSIONS, ITERATIONS, ComponentView, draw_graph,
+                         find_components, get_hue_colors, get_margin_size, layout_component,
+                         read_edo, read_net_file)
+
+def surface_to_image(surface, size):
+    if size != WINDOW_SIZE:
+        surface = pygame.transform.smoothscale(surface, (size, size))
+    return Image.frombytes('RGB', surface.get_size(), pygame.image.tobytes(surface, 'RGB'))
+
+def orient(camera, angles):
+    # x, y, z euler angles in degrees, applied about the fixed screen axes in that order
+    camera.reset()
+    x, y, z = np.radians(angles)
+    camera.rotate(x, 0, 0)
+    camera.rotate(0, y, 0)
+    camera.rotate(0, 0, z)
+
+def render_file(file_path, output_dir, component=0, rotations=((0, 0, 0),), turntable=0, gif=False,
+                size=WINDOW_SIZE, iterations=ITERATIONS, dimensions=DIMENSIONS, lod=True, symmetric=False):
+    pygame.init()
+    font = pygame.font.Font(FONT_PATH, 12)
+
+    G = read_net_file(file_path)
+    subgraphs = find_components(G)
+    if not 0 <= component < len(subgraphs):
+        raise ValueError(f'no component {component+1}, the components are numbered from 1 to {len(subgraphs)}')
+    sg = subgraphs[component]
+    edo = read_edo(file_path)
+    positions = layout_component(sg, get_margin_size(G), iterations, dimensions, edo=edo if symmetric else None)
+    view = ComponentView(sg, positions, font, get_hue_colors(edo, 145))
+
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    os.makedirs(output_dir, exist_ok=True)
+    screen = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE))
+    camera = Camera((WINDOW_SIZE/2, WINDOW_SIZE/2, WINDOW_SIZE/2))
+    written = []
+
+    for i, angles in enumerate(rotations):
+        orient(camera, angles)
+        draw_graph(screen, view, camera, lod)
+        out_path = os.path.join(output_dir, f'{name}_c{component+1}_r{i}.png')
+        surface_to_image(screen, size).save(out_path)
+        written.append(out_path)
+
+    frames = []
+    for i in range(turntable):
+        orient(camera, rotations[0])
+        camera.rotate(0, 2*math.pi * i / turntable, 0)
+        draw_graph(screen, view, camera, lod)
+        frame = surface_to_image(screen, size)
+        if gif:
+            frames.append(frame)
+        else:
+            out_path = os.path.join(output_dir, f'{name}_c{component+1}_t{i:03}.png')
+            frame.save(out_path)
+            written.append(out_path)
+    if frames:
+        out_path = os.path.join(output_dir, f'{name}_c{component+1}.gif')
+        frames[0].save(out_path, save_all=True, append_images=frames[1:], duration=1000 // 30, loop=0)
+        written.append(out_path)
+
+    return written
+
+def parse_rotation(text):
+    angles = [float(a) for a in text.split(',')]
+    if len(angles) != 3:
+        raise argparse.ArgumentTypeError(f'expected three angles x,y,z, got "{text}"')
+    return tuple(angles)
+
+def component_number(text):
+    number = int(text)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f'components are numbered from 1, got {number}')
+    return number
+
+def main():
+    parser = argparse.ArgumentParser(description='render graph components to images without a display')
+    parser.add_argument('files', nargs='+', help='.net files to render')
+    parser.add_argument('-o', '--output', default='output')
+    parser.add_argument('-c', '--component', type=component_number, default=1, help='component number, largest is 1')
+    parser.add_argument('-r', '--rotation', type=parse_rotation, action='append',
+                        help='x,y,z euler angles in degrees, can be given more than once')
+    parser.add_argument('-t', '--turntable', type=int, default=0, help='number of turntable frames')
+    parser.add_argument('--gif', action='store_true', help='write the turntable as one gif')
+    parser.add_argument('-s', '--size', type=int, default=WINDOW_SIZE, help='output image size in pixels')
+    parser.add_argument('-i', '--iterations', type=int, default=ITERATIONS)
+    parser.add_argument('-d', '--dimensions', type=int, default=DIMENSIONS)
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--no-lod', dest='lod', action='store_false')
+    parser.add_argument('--symmetric', action='store_true', help='lay out components made in all keys symmetrically')
+    args = parser.parse_args()
+
+    if args.dimensions <= 1:
+        print(f'error: dimensions must be greater than 1')
+        sys.exit(1)
+
+    job = dict(output_dir=args.output, component=args.component-1, rotations=args.rotation or [(0, 0, 0)],
+               turntable=args.turntable, gif=args.gif, size=args.size,
+               iterations=args.iterations, dimensions=args.dimensions, lod=args.lod,
+               symmetric=args.symmetric)
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(args.files)))) as pool:
+        futures = {pool.submit(render_file, f, **job): f for f in args.files}
+        for future in as_completed(futures):
+            try:
+                for path in future.result():
+                    print(path)
+            except Exception as e:
+                failed += 1
+                print(f'error: {futures[future]}: {e}')
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import sys
+import time
+import argparse
+import numpy as np
+from edo_graphs import mask_arc_chunks, mask_labels, parse_scales, popcount, scale_membership, unique_masks
+
+BLOCK_SIZE = 1 << 14
+
+def count_inside(masks, scale_masks, edo, all_keys):
+    counts = np.zeros(len(scale_masks), dtype=np.int64)
+    for start in range(0, len(masks), BLOCK_SIZE):
+        counts += scale_membership(masks[start:start+BLOCK_SIZE], scale_masks, edo, all_keys).sum(axis=1)
+    return counts
+
+def count_arcs_inside(src, dst, unions, scale_masks, edo, all_keys):
+    # an arc is inside a scale when both of its chords are, in the same key of the scale. a shape arc
+    # can stand for several chord pairs, so pairs are grouped by arc and any of them counts
+    counts = np.zeros(len(scale_masks), dtype=np.int64)
+    keys = (src << edo) | dst
+    order = np.argsort(keys, kind='stable')
+    keys, unions = keys[order], unions[order]
+    start = 0
+    while start < len(keys):
+        # blocks end on arc boundaries so no arc is counted twice
+        end = min(start + BLOCK_SIZE, len(keys))
+        while end < len(keys) and keys[end] == keys[end-1]:
+            end += 1
+        block = keys[start:end]
+        firsts = np.flatnonzero(np.concatenate(([True], block[1:] != block[:-1])))
+        member = scale_membership(unions[start:end], scale_masks, edo, all_keys)
+        counts += np.logical_or.reduceat(member, firsts, axis=1).sum(axis=1)
+        start = end
+    return counts
+
+def survey(edo, chord_sizes, intervals, do_all_keys, scale_masks, **options):
+    # chords and arcs inside each scale, from a single generation of the unfiltered graph
+    chunks = mask_arc_chunks(edo, chord_sizes, intervals, do_all_keys, unions=True, **options)
+    nodes = next(chunks)
+    chords = count_inside(nodes, scale_masks, edo, do_all_keys)
+    arcs = np.zeros(len(scale_masks), dtype=np.int64)
+    for src, dst, unions in chunks:
+        arcs += count_arcs_inside(src, dst, unions, scale_masks, edo, do_all_keys)
+    return chords, arcs
+
+def parse_chord_sizes(text):
+    smallest, _, largest = text.partition('-')
+    return int(smallest), int(largest or smallest)
+
+def main():
+    parser = argparse.ArgumentParser(description='count the chords and arcs of a graph that fit inside each scale')
+    parser.add_argument('edo', type=int)
+    parser.add_argument('chord_size', type=parse_chord_sizes, help='a size or a range like 3-5')
+    parser.add_argument('scales', nargs='*', help='binary strings or symbols, every scale shape if none are given')
+    parser.add_argument('-i', '--intervals', default='1')
+    parser.add_argument('-k', '--all-keys', action='store_true')
+    parser.add_argument('-n', '--notes', type=int, help='only survey scale shapes with this many notes')
+    parser.add_argument('--limit', type=int)
+    args = parser.parse_intermixed_args()
+
+    try:
+        scale_masks = parse_scales(args.scales, args.edo)
+    except ValueError as e:
+        print(f'error: {e}')
+        sys.exit(1)
+    if not args.scales:
+        scale_masks = unique_masks(args.edo)
+        if args.notes:
+            scale_masks = scale_masks[popcount(scale_masks, args.edo) == args.notes]
+    intervals = [int(i) for i in args.intervals.split(',')]
+
+    start = time.perf_counter()
+    chords, arcs = survey(args.edo, args.chord_size, intervals, args.all_keys, scale_masks)
+    elapsed = time.perf_counter() - start
+
+    names = mask_labels(scale_masks, args.edo, simplify_symbol=True, truncate=False)
+    order = np.lexsort((-chords, -arcs))[:args.limit]
+    for i in order.tolist():
+        binary = ''.join('1' if scale_masks[i] >> q & 1 else '0' for q in range(args.edo))
+        print(f'{names[i]:<{args.edo}}  {binary}  {chords[i]} chords  {arcs[i]} arcs')
+    print(f'{len(scale_masks)} scales in {elapsed:.2f}s')
+
+if __name__ == '__main__':
+    main()
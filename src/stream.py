@@ -0,0 +1,248 @@
+import os
+import sys
+import runpy
+import argparse
+import tempfile
+from itertools import combinations, islice
+import numpy as np
+import progress
+import tracing
+from edo_graphs import (complement_masks, mask_labels, mask_moves, parse_scales, popcount, reflect_masks,
+                        shape_filter, smallest_rotations, sorted_unique, transpose_masks)
+
+# generation with bounded memory. chords are enumerated a chunk at a time without any 2^EDO table,
+# arcs are int64 keys (source << edo | target) and are deduplicated with an external sort: sorted
+# runs are spilled to scratch files whenever the buffer is full and merged block by block. the
+# vertex list is deduplicated the same way and written straight from disk, so peak memory is set
+# by the memory limit and not by the size of the graph. writes the same file as write_mask_net_file
+#   python stream.py temp_settings.py graph.net --memory 2G
+
+CHUNK_SIZE = 1 << 15
+# bytes held per buffered key: the key, its sort copy and the merge output
+BYTES_PER_KEY = 32
+DEFAULT_MEMORY = 1 << 30
+UNITS = {'k': 1 << 10, 'm': 1 << 20, 'g': 1 << 30}
+
+def parse_memory(text):
+    # a byte count, or a number with a k, m or g suffix
+    text = str(text).strip().lower().rstrip('b')
+    if text[-1:] in UNITS:
+        return int(float(text[:-1]) * UNITS[text[-1]])
+    return int(text)
+
+def chord_chunks(edo, chord_sizes, do_all_keys, chunk_size=CHUNK_SIZE):
+    # masks of every chord with a size in chord_sizes, or of every shape when not doing all keys.
+    # a shape's smallest transposition always has pitch class 0, so only those chords are tried
+    smallest, largest = chord_sizes
+    for size in range(max(smallest, 1), min(largest, edo) + 1):
+        if do_all_keys:
+            chords = combinations(range(edo), size)
+        else:
+            chords = ((0,) + c for c in combinations(range(1, edo), size - 1))
+        while True:
+            block = list(islice(chords, chunk_size))
+            if not block:
+                break
+            masks = (np.int64(1) << np.array(block, dtype=np.int64)).sum(axis=1)
+            if not do_all_keys:
+                masks = masks[smallest_rotations(masks, edo)[0] == masks]
+            yield masks
+
+def scale_fits(masks, scale_masks, edo, all_keys=True):
+    # scale_table for a chunk of masks instead of every mask
+    if not all_keys:
+        scale_masks = np.concatenate([transpose_masks(scale_masks, i, edo) for i in range(edo)])
+    fits = np.zeros(len(masks), dtype=bool)
+    for scale in scale_masks.tolist():
+        fits |= (masks & ~scale) == 0
+    return fits
+
+def arc_key_chunks(edo, chord_sizes, intervals, do_all_keys, add_notes=False, remove_notes=False,
+                   inclusions=False, exclusions=False, include_and=True, exclude_and=False,
+                   flips=False, complements=False, scales=False, chunk_size=CHUNK_SIZE):
+    # the arcs of mask_arc_chunks as keys, chunk by chunk and not yet deduplicated
+    if type(inclusions) == str:
+        inclusions = list(inclusions)
+    if type(exclusions) == str:
+        exclusions = list(exclusions)
+    if type(intervals) == int:
+        intervals = [intervals]
+    smallest, largest = chord_sizes
+    scale_masks = parse_scales(scales, edo) if scales else None
+    for chunk in chord_chunks(edo, chord_sizes, do_all_keys, chunk_size):
+        with tracing.span('arc_chunk', chords=len(chunk)):
+            moves = list(mask_moves(chunk, edo, intervals, add_notes, remove_notes))
+            if flips:
+                moves.append((chunk, reflect_masks(chunk, edo)))
+            if complements:
+                moves.append((chunk, complement_masks(chunk, edo)))
+            src = np.concatenate([m[0] for m in moves])
+            dst = np.concatenate([m[1] for m in moves])
+            produced = len(src)
+            dst_sizes = popcount(dst, edo)
+            in_range = (dst_sizes >= max(smallest, 1)) & (dst_sizes <= largest)
+            src, dst = src[in_range], dst[in_range]
+            union = src | dst
+            if not do_all_keys:
+                dst = smallest_rotations(dst, edo)[0]
+            if scales:
+                keep = scale_fits(union, scale_masks, edo, do_all_keys)
+                src, dst = src[keep], dst[keep]
+            if flips or complements:
+                keep = src != dst
+                src, dst = src[keep], dst[keep]
+            if inclusions or exclusions:
+                shapes = (src, dst) if not do_all_keys else (smallest_rotations(src, edo)[0],
+                                                               smallest_rotations(dst, edo)[0])
+                keep = shape_filter(shapes, edo, inclusions, exclusions, include_and, exclude_and)
+                src, dst = src[keep], dst[keep]
+            tracing.count('arcs', produced=produced, filtered=produced - len(src))
+            keys = (src << edo) | dst
+        yield keys
+
+class ExternalSort:
+    # sorted unique int64 keys of any number, held in at most buffer_size keys at a time
+    def __init__(self, directory, buffer_size):
+        self.directory = directory
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.held = 0
+        self.runs = []
+
+    def add(self, keys):
+        self.buffer.append(keys)
+        self.held += len(keys)
+        if self.held >= self.buffer_size:
+            self.spill()
+
+    def spill(self):
+        if not self.held:
+            return
+        with tracing.span('spill', keys=self.held):
+            run = sorted_unique(np.concatenate(self.buffer))
+            self.buffer, self.held = [], 0
+            path = os.path.join(self.directory, f'run{len(os.listdir(self.directory))}.bin')
+            run.tofile(path)
+            self.runs.append((path, len(run)))
+
+    def blocks(self):
+        # yields the merged keys in ascending blocks. every round takes the keys up to the smallest
+        # last key among the runs' current blocks, so no key is split across two rounds
+        self.spill()
+        runs = [np.memmap(path, dtype=np.int64, mode='r', shape=(length,)) for path, length in self.runs]
+        block_size = max(1, self.buffer_size // (len(runs) + 1))
+        starts = [0] * len(runs)
+        with tracing.span('merge', runs=len(runs)):
+            while True:
+                heads = [run[start:start + block_size] for run, start in zip(runs, starts)]
+                live = [i for i, head in enumerate(heads) if len(head)]
+                if not live:
+                    break
+                bound = min(heads[i][-1] for i in live)
+                taken = []
+                for i in live:
+                    count = int(np.searchsorted(heads[i], bound, side='right'))
+                    taken.append(heads[i][:count])
+                    starts[i] += count
+                yield sorted_unique(np.concatenate(taken))
+
+    def write(self, path):
+        # writes the merged keys to path, returns how many there are
+        total = 0
+        with open(path, 'wb') as file:
+            for block in self.blocks():
+                block.tofile(file)
+                total += len(block)
+        return total
+
+def read_blocks(path, count, block_size):
+    keys = np.memmap(path, dtype=np.int64, mode='r', shape=(count,)) if count else np.zeros(0, dtype=np.int64)
+    for start in range(0, count, block_size):
+        yield np.asarray(keys[start:start + block_size])
+
+@tracing.traced()
+def write_stream_net_file(filename, edo, chord_sizes, intervals, do_all_keys, add_notes=False, remove_notes=False,
+                          inclusions=False, exclusions=False, include_and=True, exclude_and=False,
+                          simplify_symbol=False, truncate=True, flips=False, complements=False, scales=False,
+                          memory=DEFAULT_MEMORY, directory=None):
+    # returns (vertices, arcs) like write_mask_net_file
+    if 2 * edo > 63:
+        raise ValueError(f'streaming keys hold two {edo} bit chords, the most is 31-EDO')
+    chord_sizes = tuple(chord_sizes)
+    buffer_size = max(1 << 10, memory // BYTES_PER_KEY)
+    with tempfile.TemporaryDirectory(dir=directory) as scratch:
+        arc_dir, vertex_dir = os.path.join(scratch, 'arcs'), os.path.join(scratch, 'vertices')
+        os.mkdir(arc_dir)
+        os.mkdir(vertex_dir)
+
+        arcs = ExternalSort(arc_dir, buffer_size)
+        with progress.Stage('generate') as generating:
+            for keys in arc_key_chunks(edo, chord_sizes, intervals, do_all_keys, add_notes, remove_notes,
+                                       inclusions, exclusions, include_and, exclude_and, flips, complements,
+                                       scales):
+                arcs.add(keys)
+                generating.advance(len(keys))
+
+        # only chords with arcs become vertices, like the other pipelines
+        vertices = ExternalSort(vertex_dir, buffer_size)
+        arc_path = os.path.join(scratch, 'arcs.bin')
+        num_arcs = 0
+        with open(arc_path, 'wb') as file, progress.Stage('merge') as merging:
+            for block in arcs.blocks():
+                block.tofile(file)
+                vertices.add(sorted_unique(np.concatenate([block >> edo, block & ((1 << edo) - 1)])))
+                num_arcs += len(block)
+                merging.advance(len(block))
+        vertex_path = os.path.join(scratch, 'vertices.bin')
+        num_vertices = vertices.write(vertex_path)
+        tracing.count('arcs', written=num_arcs)
+
+        block_size = max(1, buffer_size // 4)
+        nodes = np.memmap(vertex_path, dtype=np.int64, mode='r', shape=(num_vertices,)) if num_vertices else None
+        with open(filename, 'w') as file, progress.Stage('write', num_arcs) as writing:
+            file.write(f'%{edo}\n')
+            file.write(f'*Vertices {num_vertices}\n')
+            number = 1
+            for block in read_blocks(vertex_path, num_vertices, block_size):
+                labels = mask_labels(block, edo, simplify_symbol, truncate, smallest_rotations(block, edo))
+                file.write(''.join([f'{number + i} "{label}" 0.0 0.0 0.0\n' for i, label in enumerate(labels)]))
+                number += len(block)
+            file.write(f'*Arcs \n')
+            for block in read_blocks(arc_path, num_arcs, block_size):
+                src = np.searchsorted(nodes, block >> edo) + 1
+                dst = np.searchsorted(nodes, block & ((1 << edo) - 1)) + 1
+                file.write(''.join([f'{a} {b} 1.0\n' for a, b in zip(src.tolist(), dst.tolist())]))
+                writing.advance(len(block))
+        del nodes
+    return num_vertices, num_arcs
+
+def write_settings_graph(settings, filename, memory=DEFAULT_MEMORY, directory=None):
+    # generate_graph for launcher settings, streamed
+    s = settings
+    if s.get('REMOVE_REFLECTIONS') or s.get('REMOVE_COMPLEMENTS'):
+        raise ValueError('streaming does not support REMOVE_REFLECTIONS or REMOVE_COMPLEMENTS')
+    chord_sizes = s['CHORD_SIZE'] if isinstance(s['CHORD_SIZE'], list) else (s['CHORD_SIZE'], s['CHORD_SIZE'])
+    return write_stream_net_file(filename, s['EDO'], chord_sizes, s['INTERVALS'], s['DO_ALL_KEYS'],
+                                 s.get('ADD_REMOVE_NOTES', False), s.get('ADD_REMOVE_NOTES', False),
+                                 s['INCLUSIONS'], s['EXCLUSIONS'], s['INCLUDE_AND'], s['EXCLUDE_AND'],
+                                 s['SIMPLIFY_SYMBOLS'], s['TRUNCATE_SYMBOLS'], s.get('FLIP_CHORDS', False),
+                                 s.get('COMPLEMENT_CHORDS', False), s.get('SCALES', False), memory, directory)
+
+def main():
+    parser = argparse.ArgumentParser(description='generate a graph with bounded memory')
+    parser.add_argument('settings', help='settings file, like temp_settings.py')
+    parser.add_argument('output', help='net file to write')
+    parser.add_argument('-m', '--memory', default='1G', help='memory limit for buffered arcs, eg. 512M or 4G')
+    parser.add_argument('-t', '--tmp', help='directory for scratch files, the system one by default')
+    args = parser.parse_args()
+
+    try:
+        vertices, arcs = write_settings_graph(runpy.run_path(args.settings), args.output,
+                                              parse_memory(args.memory), args.tmp)
+    except (ValueError, OSError) as e:
+        print(f'error: {e}')
+        sys.exit(1)
+    print(f'{vertices} vertices, {arcs} arcs')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from edo_graphs import generate_transformations, write_net_file, read_net_arcs
+import catalog
+import fingerprint
+
+# example spec:
+# {
+#     "EDO": {"range": [5, 31]},
+#     "CHORD_SIZE": [3, 4],
+#     "INTERVALS": [[1], [1, 2]],
+#     "FILTERS": [{"INCLUSIONS": false}, {"INCLUSIONS": ["32", "23"], "INCLUDE_AND": true}],
+#     "DO_ALL_KEYS": true
+# }
+# a list sweeps over its values, {"range": [a, b]} or {"range": [a, b, step]} sweeps a to b inclusive,
+# anything else is fixed. INTERVALS sweeps only when given a list of lists.
+
+DEFAULT_CONFIG = {
+    'EDO': 12,
+    'CHORD_SIZE': 4,
+    'INTERVALS': [1],
+    'DO_ALL_KEYS': True,
+    'TRUNCATE_SYMBOLS': True,
+    'SIMPLIFY_SYMBOLS': True,
+    'INCLUSIONS': False,
+    'EXCLUSIONS': False,
+    'INCLUDE_AND': True,
+    'EXCLUDE_AND': False,
+}
+
+def sweep_values(key, value):
+    if isinstance(value, dict) and 'range' in value:
+        start, stop, *step = value['range']
+        return list(range(start, stop + 1, step[0] if step else 1))
+    if key == 'INTERVALS':
+        if isinstance(value, list) and value and all(isinstance(v, list) for v in value):
+            return value
+        return [value]
+    if isinstance(value, list):
+        return value
+    return [value]
+
+def expand_spec(spec):
+    spec = dict(spec)
+    presets = spec.pop('FILTERS', [{}])
+    unknown = set(spec) - set(DEFAULT_CONFIG)
+    if unknown:
+        raise ValueError(f'unknown sweep keys: {", ".join(sorted(unknown))}')
+    keys = list(spec)
+    for values in itertools.product(*(sweep_values(k, spec[k]) for k in keys)):
+        for preset in presets:
+            config = dict(DEFAULT_CONFIG)
+            config.update(zip(keys, values))
+            config.update(preset)
+            if 0 < config['CHORD_SIZE'] <= config['EDO']:
+                yield config
+
+def config_id(config):
+    return hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+
+def write_once(path, labels, arcs, edo):
+    # isomorphic graphs share one file; whichever worker links it first wins
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    write_net_file(temp_path, labels, arcs, edo)
+    try:
+        os.link(temp_path, path)
+        return True
+    except FileExistsError:
+        return False
+    finally:
+        os.remove(temp_path)
+
+def run_config(config, output_dir, dedupe=True, exact=True):
+    record = {'id': config_id(config), 'config': config}
+    timings = {}
+
+    start = time.perf_counter()
+    labels, arcs = generate_transformations(config['EDO'], config['CHORD_SIZE'], config['INTERVALS'],
+                                            config['DO_ALL_KEYS'], config['INCLUSIONS'], config['EXCLUSIONS'],
+                                            config['INCLUDE_AND'], config['EXCLUDE_AND'],
+                                            config['SIMPLIFY_SYMBOLS'], config['TRUNCATE_SYMBOLS'])
+    timings['generate'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    G = fingerprint.build_graph(labels, arcs)
+    prints = fingerprint.fingerprint(G)
+    timings['fingerprint'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    duplicate = False
+    graph_file = None
+    if dedupe:
+        # isomorphic graphs share one file, written by whichever configuration got there first,
+        # so a duplicate's file carries that configuration's chord labels rather than its own
+        shared_file = os.path.join('graphs', f'{prints["wl_hash"]}.net')
+        path = os.path.join(output_dir, shared_file)
+        if not os.path.exists(path) and write_once(path, labels, arcs, config['EDO']):
+            graph_file = shared_file
+        else:
+            # equal hashes are only a hint, different graphs like a 12-cycle and two 6-cycles collide
+            stored_labels, stored_arcs, _ = read_net_arcs(path)
+            if not exact or fingerprint.is_isomorphic(fingerprint.build_graph(stored_labels, stored_arcs), G):
+                duplicate = True
+                graph_file = shared_file
+    if graph_file is None:
+        graph_file = os.path.join('graphs', f'{record["id"]}.net')
+        write_net_file(os.path.join(output_dir, graph_file), labels, arcs, config['EDO'])
+    timings['write'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    # always this configuration's own graph, whichever file it ends up sharing
+    invariants = catalog.graph_invariants(labels, arcs)
+    timings['invariants'] = time.perf_counter() - start
+
+    record.update({
+        'graph_file': graph_file,
+        'vertices': len(labels),
+        'edges': len(arcs),
+        'duplicate': duplicate,
+        **prints,
+        **invariants,
+        'timings': timings,
+    })
+    return record
+
+def run_config_safe(config, output_dir, dedupe=True, exact=True):
+    try:
+        return run_config(config, output_dir, dedupe, exact)
+    except Exception as e:
+        return {'id': config_id(config), 'config': config, 'error': f'{type(e).__name__}: {e}'}
+
+def completed_ids(summary_path):
+    done = set()
+    if os.path.exists(summary_path):
+        with open(summary_path, 'r') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                    # failures can be transient, like a worker running out of memory, so they are run again
+                    if 'error' not in record:
+                        done.add(record['id'])
+                except (ValueError, KeyError):
+                    # a line cut short by a crash, that entry is simply run again
+                    pass
+    return done
+
+def run_sweep(spec, output_dir, workers=None, on_record=None, dedupe=True, exact=True):
+    os.makedirs(os.path.join(output_dir, 'graphs'), exist_ok=True)
+    summary_path = os.path.join(output_dir, 'summary.jsonl')
+    done = completed_ids(summary_path)
+    configs = [c for c in expand_spec(spec) if config_id(c) not in done]
+    workers = workers or os.cpu_count()
+    total = len(configs)
+    print(f'{len(done)} configurations already done, {total} to run')
+
+    finished = 0
+    with open(summary_path, 'a') as summary, ProcessPoolExecutor(max_workers=workers) as pool:
+        if summary.tell() > 0:
+            with open(summary_path, 'rb') as file:
+                file.seek(-1, os.SEEK_END)
+                if file.read(1) != b'\n':
+                    summary.write('\n')
+        pending = set()
+        configs = iter(configs)
+        while True:
+            # keep only a bounded number of jobs queued so huge sweeps don't sit in memory
+            for config in itertools.islice(configs, 2*workers - len(pending)):
+                pending.add(pool.submit(run_config_safe, config, output_dir, dedupe, exact))
+            if not pending:
+                break
+            completed, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in completed:
+                record = future.result()
+                summary.write(json.dumps(record) + '\n')
+                summary.flush()
+                finished += 1
+                config = record['config']
+                name = f'{config["EDO"]}e{config["CHORD_SIZE"]} {",".join(map(str, config["INTERVALS"]))}'
+                if 'error' in record:
+                    print(f'[{finished}/{total}] {name}: error: {record["error"]}')
+                else:
+                    print(f'[{finished}/{total}] {name}: {record["vertices"]} vertices, {record["edges"]} edges, '
+                          f'{record["components"]} components ({sum(record["timings"].values()):.2f}s)'
+                          f'{" (duplicate)" if record["duplicate"] else ""}')
+                if on_record is not None:
+                    on_record(record)
+
+def main():
+    parser = argparse.ArgumentParser(description='generate graphs for every combination in a sweep spec')
+    parser.add_argument('spec', help='json sweep spec')
+    parser.add_argument('-o', '--output', default='sweep')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--catalog', metavar='DB', help='also add every result to this catalog database')
+    parser.add_argument('--no-dedupe', dest='dedupe', action='store_false',
+                        help='write every graph even when an isomorphic one is already stored')
+    parser.add_argument('--wl-only', dest='exact', action='store_false',
+                        help='trust fingerprint matches without the exact isomorphism check')
+    args = parser.parse_args()
+
+    with open(args.spec, 'r') as file:
+        spec = json.load(file)
+
+    on_record = None
+    if args.catalog:
+        conn = catalog.connect(args.catalog)
+        def on_record(record):
+            with conn:
+                catalog.insert_record(conn, record, args.output)
+
+    try:
+        run_sweep(spec, args.output, args.workers, on_record, args.dedupe, args.exact)
+    except ValueError as e:
+        print(f'error: {e}')
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+import math
+import numpy as np
+from edo_graphs import parse_chord, sorted_unique, transpose_masks
+
+# a graph made in all keys is unchanged by transposing every chord, and a component of it is
+# unchanged by transposing some number of steps. that makes its layout symmetric: with order m
+# transpositions taking the component to itself, every chord's position can be the position of
+# a representative rotated by a multiple of 2pi/m in the first two layout dimensions, and only the
+# representatives need forces. chords whose transpositions come back early (symmetric chords, like
+# the augmented triad in 12-EDO) would have to sit on the rotation axis on top of each other, so
+# they are laid out freely instead
+
+class TranspositionSymmetry:
+    def __init__(self, step, order, members, free):
+        # members[r, j] is the node of representative r transposed by j*step, members[:, 0] are the
+        # representatives. free are the nodes that get forces of their own
+        self.step = step
+        self.order = order
+        self.members = members
+        self.free = free
+        self.rows = np.sort(np.concatenate([members[:, 0], free]))
+
+    def rotations(self, dimensions):
+        # the rotation for each multiple of the step, acting on row vectors
+        result = []
+        for j in range(self.order):
+            angle = 2 * math.pi * j / self.order
+            R = np.eye(dimensions)
+            R[:2, :2] = [[math.cos(angle), math.sin(angle)], [-math.sin(angle), math.cos(angle)]]
+            result.append(R)
+        return result
+
+    def spread(self, pos, rotations):
+        # places every transposition of a representative from the representative
+        representatives = pos[self.members[:, 0]]
+        for j in range(1, self.order):
+            pos[self.members[:, j]] = representatives @ rotations[j]
+
+def find_symmetry(labels, src, dst, edo):
+    # the transposition symmetry of a component with these labels and edges (node indices), or
+    # None when only the identity takes it to itself or the labels aren't chords
+    try:
+        masks = np.array([parse_chord(str(label), edo) for label in labels], dtype=np.int64)
+    except ValueError:
+        return None
+    order = np.argsort(masks, kind='stable')
+    sorted_masks = masks[order]
+    if len(sorted_unique(masks)) != len(masks):
+        return None
+    edges = sorted_unique((masks[src] << edo) | masks[dst])
+
+    def node_of(transposed):
+        # node index of each transposed mask, -1 when it isn't in the component
+        found = np.minimum(np.searchsorted(sorted_masks, transposed), len(masks) - 1)
+        return np.where(sorted_masks[found] == transposed, order[found], -1)
+
+    for step in range(1, edo):
+        if edo % step:
+            continue
+        moved = node_of(transpose_masks(masks, step, edo))
+        if (moved < 0).any():
+            continue
+        moved_edges = sorted_unique((masks[moved[src]] << edo) | masks[moved[dst]])
+        if len(moved_edges) == len(edges) and (moved_edges == edges).all():
+            break
+    else:
+        return None
+
+    count = edo // step
+    # orbit[j] is every node transposed by j*step
+    orbit = [np.arange(len(masks))]
+    for _ in range(1, count):
+        orbit.append(moved[orbit[-1]])
+    orbit = np.array(orbit)
+    full = (orbit[1:] != orbit[0]).all(axis=0)
+    # the representative of an orbit is its smallest chord
+    smallest = masks[orbit].min(axis=0)
+    representatives = np.flatnonzero(full & (masks == smallest))
+    return TranspositionSymmetry(step, count, orbit[:, representatives].T, np.flatnonzero(~full))
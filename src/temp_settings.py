@@ -10,3 +10,9 @@ INCLUSIONS = '32', '23'
 EXCLUSIONS = False
 INCLUDE_AND = True
 EXCLUDE_AND = False
+ADD_REMOVE_NOTES = False
+FLIP_CHORDS = False
+COMPLEMENT_CHORDS = False
+REMOVE_REFLECTIONS = False
+REMOVE_COMPLEMENTS = False
+SCALES = False
@@ -0,0 +1,93 @@
+import os
+import json
+import time
+import atexit
+import functools
+import threading
+
+# spans and counters written as a chrome trace-event file, open it in chrome://tracing or perfetto.
+# set EDO_GRAPHS_TRACE to the output path to turn it on:
+#   EDO_GRAPHS_TRACE=trace.json python display_net.py
+# when it isn't set, span() hands back one shared object that does nothing, traced() returns the
+# function itself and count() returns straight away, so instrumented code runs as before.
+# other processes (layout prefetching, the launcher's worker) write next to it as trace.<pid>.json
+PATH = os.environ.get('EDO_GRAPHS_TRACE')
+ENABLED = bool(PATH)
+
+events = []
+main_pid = os.getpid()
+depth = threading.local()
+
+def now():
+    # trace timestamps are in microseconds
+    return time.perf_counter_ns() / 1000
+
+def output_path():
+    if os.getpid() == main_pid:
+        return PATH
+    root, ext = os.path.splitext(PATH)
+    return f'{root}.{os.getpid()}{ext or ".json"}'
+
+def write():
+    if not events:
+        return
+    with open(output_path(), 'w') as file:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
+
+class Span:
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        depth.value = getattr(depth, 'value', 0) + 1
+        self.start = now()
+        return self
+
+    def __exit__(self, *exc):
+        end = now()
+        event = {'name': self.name, 'cat': 'edo_graphs', 'ph': 'X', 'ts': self.start, 'dur': end - self.start,
+                 'pid': os.getpid(), 'tid': threading.get_ident()}
+        if self.args:
+            event['args'] = self.args
+        events.append(event)
+        depth.value -= 1
+        # pool processes end without running atexit, so they write whenever a top level span ends
+        if depth.value == 0 and os.getpid() != main_pid:
+            write()
+
+class NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+NO_SPAN = NoSpan()
+
+def span(name, **args):
+    return Span(name, args) if ENABLED else NO_SPAN
+
+def traced(name=None):
+    # decorator version of span, named after the function unless given a name
+    def decorate(function):
+        if not ENABLED:
+            return function
+        label = name or function.__name__
+        # wraps keeps the qualified name, so pool workers can still pickle the function
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with Span(label, None):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def count(name, **values):
+    # a counter track, each keyword is one series
+    if ENABLED:
+        events.append({'name': name, 'ph': 'C', 'ts': now(), 'pid': os.getpid(), 'args': values})
+
+if ENABLED:
+    atexit.register(write)
+    # a forked process starts with a copy of the parent's events
+    os.register_at_fork(after_in_child=events.clear)
@@ -0,0 +1,60 @@
+import os
+import sys
+import json
+import time
+import runpy
+import hashlib
+# imported once when the worker starts, so jobs never pay for them
+import numpy as np
+import networkx as nx
+import scipy.sparse
+import progress
+import tracing
+from edo_graphs import generate_graph
+
+# the launcher keeps one of these running and writes one json job per line to its stdin:
+#   {"id": 3, "settings": "src/temp_settings.py", "output": "src/graph.net"}
+# every reply is one json line on stdout with the job id and a status of done, cached or error.
+# other output (warnings) goes through as plain text. a stale job is cancelled by the launcher,
+# which replaces the whole process, so jobs never have to check for it themselves
+
+def send(message):
+    print(json.dumps(message), flush=True)
+
+def settings_key(settings_file):
+    with open(settings_file, 'rb') as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+def run_job(job, last):
+    key = settings_key(job['settings'])
+    # same settings as the last finished job and its graph is still there
+    if last.get('key') == key and last.get('output') == job['output'] and os.path.exists(job['output']):
+        return {**last, 'status': 'cached'}
+    start = time.perf_counter()
+    settings = runpy.run_path(job['settings'])
+    vertices, arcs = generate_graph(settings, job['output'])
+    return {'status': 'done', 'key': key, 'output': job['output'], 'vertices': vertices, 'arcs': arcs,
+            'elapsed': time.perf_counter() - start}
+
+def main():
+    send({'status': 'ready', 'pid': os.getpid()})
+    last = {}
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        job = json.loads(line)
+        # progress events carry the job id, so the launcher can drop those of a cancelled job
+        progress.context['id'] = job['id']
+        try:
+            with tracing.span('job', id=job['id']):
+                result = run_job(job, last)
+            last = result
+        except Exception as e:
+            result = {'status': 'error', 'error': f'{type(e).__name__}: {e}'}
+        # the launcher kills the worker instead of letting it exit, so the trace is written every job
+        if tracing.ENABLED:
+            tracing.write()
+        send({'id': job['id'], **result})
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+import tempfile
+import pygame
+from benchmark import CASES, FONT_PATH, MIN_SECONDS, case_name, compare, run_case
+
+STAGES = ['unique_binaries', 'interval_neighbors', 'generate_transformations', 'write_net_file', 'read_net_file',
+          'layout', 'seb', 'draw_graph']
+
+def results(case, **seconds):
+    return {'case': case, 'stages': {name: {'seconds': s, 'peak_bytes': 0} for name, s in seconds.items()}}
+
+def test_compare_reports_only_slower_stages():
+    baseline = {'results': [results('a', layout=1.0, seb=0.001, draw_graph=0.5)]}
+    found = compare([results('a', layout=1.3, seb=0.002, draw_graph=0.55, write_net_file=9.0),
+                     results('b', layout=5.0)], baseline)
+    # seb doubled but by less than MIN_SECONDS, stages and cases missing from the baseline are skipped
+    assert 0.001 < MIN_SECONDS
+    assert found == [('a', 'layout', 1.0, 1.3)]
+    assert compare([results('a', layout=1.3)], baseline, threshold=1.5) == []
+
+def test_run_case_times_every_stage():
+    pygame.init()
+    font = pygame.font.Font(FONT_PATH, 12)
+    with tempfile.TemporaryDirectory() as directory:
+        result = run_case(CASES[0], 1, 1, 1, font, directory)
+    pygame.quit()
+    assert result['case'] == case_name(CASES[0]) == '12edo-3-[1]-reduced'
+    assert list(result['stages']) == STAGES
+    assert all(stage['seconds'] >= 0 and stage['peak_bytes'] >= 0 for stage in result['stages'].values())
+    assert result['vertices'] > 0 and result['arcs'] > 0 and result['layout_nodes'] <= result['vertices']
@@ -0,0 +1,44 @@
+from itertools import combinations
+import networkx as nx
+import pytest
+from chord_paths import ChordGraph, interval_sequences, meet
+
+def count_shortest_paths(G, start, goal, lengths):
+    counts = {start: 1}
+    for node in sorted(lengths, key=lengths.get)[1:]:
+        counts[node] = sum(counts[p] for p in G.predecessors(node) if lengths.get(p) == lengths[node] - 1)
+    return counts[goal]
+
+def chord_digraph(graph, size):
+    G = nx.DiGraph()
+    for notes in combinations(range(graph.edo), size):
+        mask = graph.canonical(sum(1 << q for q in notes))
+        G.add_node(mask)
+        for _, other in graph.neighbors(mask):
+            G.add_edge(mask, other)
+    return G
+
+@pytest.mark.parametrize('edo, size, intervals', [(9, 3, [1]), (9, 3, [2, 4]), (10, 4, [3])])
+def test_distances_and_path_counts_match_networkx(edo, size, intervals):
+    graph = ChordGraph(edo, intervals)
+    G = chord_digraph(graph, size)
+    nodes = sorted(G)
+    for start in nodes[::17]:
+        lengths = nx.single_source_shortest_path_length(G, start)
+        for goal in nodes[::11]:
+            distance, sequences, paths = interval_sequences(graph, start, goal)
+            assert distance == lengths.get(goal)
+            if distance is None:
+                continue
+            assert paths == count_shortest_paths(G, start, goal, lengths)
+            for chords in sequences.values():
+                assert chords[0] == start and chords[-1] == goal and len(chords) == distance + 1
+                assert all(G.has_edge(a, b) for a, b in zip(chords, chords[1:]))
+
+def test_reduced_graph_distances():
+    graph = ChordGraph(12, [1, 2], do_all_keys=False)
+    G = chord_digraph(graph, 3)
+    start = min(G)
+    lengths = nx.single_source_shortest_path_length(G, start)
+    for goal in G:
+        assert meet(graph, start, goal)[0] == lengths.get(goal)
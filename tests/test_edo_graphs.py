@@ -0,0 +1,130 @@
+from itertools import combinations
+import numpy as np
+import pytest
+from edo_graphs import (complement_masks, generate_graph, generate_transformations, mask_arc_chunks, mask_labels,
+                        orbit_table, popcount, reflect_masks, rotation_table, scale_table, transpose_masks,
+                        unique_masks, write_mask_net_file)
+from estimate import estimate_graph, necklaces
+
+def mask_arcs(edo, chord_size, intervals, do_all_keys, **options):
+    chunks = mask_arc_chunks(edo, (chord_size, chord_size), intervals, do_all_keys, **options)
+    next(chunks)
+    arcs = set()
+    for src, dst in chunks:
+        arcs.update(zip(mask_labels(src, edo), mask_labels(dst, edo)))
+    return arcs
+
+@pytest.mark.parametrize('edo, chord_size, intervals, do_all_keys, inclusions, exclusions', [
+    (12, 3, [1], True, False, False),
+    (12, 4, [1, 5], False, False, False),
+    (9, 3, [2], True, ['11'], False),
+    (10, 4, [1, 3], False, False, ['2']),
+])
+def test_mask_pipeline_matches_string_pipeline(edo, chord_size, intervals, do_all_keys, inclusions, exclusions):
+    _, arcs = generate_transformations(edo, chord_size, intervals, do_all_keys, inclusions, exclusions, True, False)
+    assert mask_arcs(edo, chord_size, intervals, do_all_keys, inclusions=inclusions, exclusions=exclusions) == arcs
+
+@pytest.mark.parametrize('scale', ['1011010101101', '111111100000'])
+def test_scale_filter_matches_string_pipeline(scale):
+    scale = scale[:12]
+    for do_all_keys in (True, False):
+        _, arcs = generate_transformations(12, 3, [1, 2], do_all_keys, False, False, True, False, scales=[scale])
+        assert mask_arcs(12, 3, [1, 2], do_all_keys, scales=[scale]) == arcs
+
+def brute_orbits(edo, reflections, complements):
+    masks = np.arange(1 << edo, dtype=np.int64)
+    orbit = [transpose_masks(masks, i, edo) for i in range(edo)]
+    if reflections:
+        orbit += [reflect_masks(m, edo) for m in orbit]
+    if complements:
+        orbit += [complement_masks(m, edo) for m in orbit]
+    return np.min(orbit, axis=0)
+
+@pytest.mark.parametrize('edo', [5, 8, 9])
+def test_orbit_tables(edo):
+    for reflections in (False, True):
+        for complements in (False, True):
+            assert (orbit_table(edo, reflections, complements) == brute_orbits(edo, reflections, complements)).all()
+
+def test_orbit_representatives_stay_in_size_range():
+    edo, chord_sizes = 8, (2, 5)
+    table = orbit_table(edo, True, True, chord_sizes)
+    sizes = popcount(np.arange(1 << edo), edo)
+    inside = (sizes >= 2) & (sizes <= 5)
+    represented = popcount(table[inside], edo)
+    assert ((represented >= 2) & (represented <= 5)).all()
+    # one representative per orbit
+    full = orbit_table(edo, True, True)
+    for c in set(full[inside].tolist()):
+        assert len(set(table[inside & (full == c)].tolist())) == 1
+
+def test_remove_complements_writes_valid_arcs(tmp_path):
+    path = tmp_path / 'graph.net'
+    vertices, arcs = write_mask_net_file(str(path), 6, (3, 4), [1], False, True, True, remove_complements=True)
+    lines = path.read_text().splitlines()
+    assert lines[1] == f'*Vertices {vertices}'
+    numbers = [int(n) for line in lines[vertices + 3:] for n in line.split()[:2]]
+    assert len(numbers) == 2 * arcs and min(numbers) >= 1 and max(numbers) <= vertices
+
+def test_complements_outside_chord_sizes_are_an_error(tmp_path):
+    settings = {'EDO': 12, 'CHORD_SIZE': [3, 4], 'INTERVALS': [1], 'DO_ALL_KEYS': False, 'ADD_REMOVE_NOTES': False,
+                'FLIP_CHORDS': False, 'COMPLEMENT_CHORDS': True, 'REMOVE_REFLECTIONS': False,
+                'REMOVE_COMPLEMENTS': False, 'INCLUSIONS': False, 'EXCLUSIONS': False, 'INCLUDE_AND': True,
+                'EXCLUDE_AND': False, 'SIMPLIFY_SYMBOLS': False, 'TRUNCATE_SYMBOLS': True, 'SCALES': False}
+    path = str(tmp_path / 'graph.net')
+    with pytest.raises(ValueError, match='COMPLEMENT_CHORDS'):
+        generate_graph(settings, path)
+    vertices, arcs = generate_graph({**settings, 'CHORD_SIZE': [4, 8]}, path)
+    assert vertices and arcs
+
+@pytest.mark.parametrize('all_keys', [True, False])
+def test_scale_table(all_keys):
+    edo = 9
+    scales = np.array([0b101101011, 0b000111111], dtype=np.int64)
+    fits = scale_table(edo, scales, all_keys)
+    keys = range(edo) if not all_keys else [0]
+    for m in range(1 << edo):
+        expected = any(m & ~int(transpose_masks(scales, k, edo)[i]) == 0 for k in keys for i in range(len(scales)))
+        assert fits[m] == expected
+
+def test_rotation_table():
+    edo = 10
+    canonical, key = rotation_table(edo)
+    masks = np.arange(1 << edo, dtype=np.int64)
+    assert (transpose_masks(canonical, 0, edo) == canonical).all()
+    assert (transpose_masks(canonical, key, edo) == masks).all()
+    assert (canonical == np.min([transpose_masks(masks, i, edo) for i in range(edo)], axis=0)).all()
+
+@pytest.mark.parametrize('edo', range(1, 15))
+def test_necklaces(edo):
+    sizes = popcount(unique_masks(edo), edo)
+    for size in range(edo + 1):
+        assert necklaces(edo, size) == (sizes == size).sum()
+
+def test_estimate_counts_arcs_in_all_keys():
+    chunks = mask_arc_chunks(12, (4, 4), [1, 5], True)
+    nodes = next(chunks)
+    chords, arcs, _ = estimate_graph(12, (4, 4), [1, 5], True, 1)
+    assert chords == len(nodes)
+    assert arcs == sum(len(src) for src, _ in chunks)
+
+@pytest.mark.parametrize('edo, chord_sizes, intervals, all_keys', [
+    (12, (3, 5), [1], True),
+    (12, (2, 6), [1, 5], True),
+    (9, (1, 9), [2], True),
+    (12, (3, 5), [1], False),
+    (10, (2, 4), [1, 3], False),
+])
+def test_estimate_bounds_arcs_over_size_ranges(tmp_path, edo, chord_sizes, intervals, all_keys):
+    _, arcs = write_mask_net_file(str(tmp_path / 'graph.net'), edo, chord_sizes, intervals, all_keys)
+    _, estimate, _ = estimate_graph(edo, chord_sizes, intervals, all_keys, 1)
+    assert estimate >= arcs
+    if all_keys and len(intervals) == 1:
+        # one interval never gives the same arc twice, so the bound is exact
+        assert estimate == arcs
+
+def test_combinations_match_popcount():
+    edo = 7
+    for size in range(edo + 1):
+        masks = [sum(1 << q for q in c) for c in combinations(range(edo), size)]
+        assert (popcount(np.array(masks, dtype=np.int64), edo) == size).all()
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+from graph_algebra import (complement, difference, edge_keys, intersection, split_keys, symmetric_difference, union,
+                           universe_keys)
+
+EDO = 8
+
+def random_graph(rng, n):
+    src = rng.integers(0, 1 << EDO, n)
+    dst = rng.integers(0, 1 << EDO, n)
+    return edge_keys(src, dst, EDO)
+
+def as_set(keys):
+    return set(zip(*(k.tolist() for k in split_keys(keys, EDO))))
+
+@pytest.mark.parametrize('sizes', [(0, 0), (0, 50), (50, 0), (200, 300), (1000, 1000)])
+def test_operations_match_sets(sizes):
+    rng = np.random.default_rng(sum(sizes))
+    a, b = random_graph(rng, sizes[0]), random_graph(rng, sizes[1])
+    # overlap the two graphs so every operation has something to do
+    b = union(b, a[::3])
+    sa, sb = as_set(a), as_set(b)
+    assert as_set(union(a, b)) == sa | sb
+    assert as_set(intersection(a, b)) == sa & sb
+    assert as_set(difference(a, b)) == sa - sb
+    assert as_set(symmetric_difference(a, b)) == sa ^ sb
+    for keys in (union(a, b), intersection(a, b), difference(a, b), symmetric_difference(a, b)):
+        assert (np.diff(keys) > 0).all()
+
+def test_complement_against_universe():
+    universe = universe_keys(EDO, (3, 3), [1, 2], True)
+    g = universe[::5]
+    assert len(symmetric_difference(union(complement(g, universe), g), universe)) == 0
+    assert len(intersection(complement(g, universe), g)) == 0
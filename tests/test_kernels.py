@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+import kernels
+
+numba_only = pytest.mark.skipif(kernels.numba is None, reason='numba is not installed')
+
+def random_layout(n, dimensions, edges, seed):
+    rng = np.random.default_rng(seed)
+    pos = rng.random((n, dimensions))
+    src, dst = rng.integers(0, n, edges), rng.integers(0, n, edges)
+    # a repeated node and a self loop, both have zero length
+    pos[1] = pos[0]
+    src[0] = dst[0] = 2
+    return pos, src.astype(np.intp), dst.astype(np.intp)
+
+def test_smallest_rotations_numpy():
+    edo = 9
+    masks = np.arange(1 << edo, dtype=np.int64)
+    canonical, key = kernels.smallest_rotations_numpy(masks, edo)
+    full = (1 << edo) - 1
+    rotations = [((masks >> i) | (masks << (edo - i))) & full for i in range(edo)]
+    assert (canonical == np.min(rotations, axis=0)).all()
+    assert (((canonical << key) | (canonical >> (edo - key))) & full == masks).all()
+
+@numba_only
+@pytest.mark.parametrize('edo', [7, 12, 19])
+def test_smallest_rotations_backends_agree(edo):
+    masks = np.random.default_rng(edo).integers(0, 1 << edo, 5000)
+    expected = kernels.smallest_rotations_numpy(masks, edo)
+    found = kernels.smallest_rotations_numba(masks, edo)
+    assert (expected[0] == found[0]).all() and (expected[1] == found[1]).all()
+
+@numba_only
+@pytest.mark.parametrize('dimensions', [2, 3, 5])
+def test_farthest_point_backends_agree(dimensions):
+    points = np.random.default_rng(dimensions).random((500, dimensions))
+    center = points.mean(axis=0)
+    assert kernels.farthest_point_numpy(points, center) == kernels.farthest_point_numba(points, center)
+
+@numba_only
+@pytest.mark.parametrize('n, dimensions, edges', [(40, 2, 80), (150, 3, 400), (60, 6, 100)])
+def test_spring_layout_backends_agree(n, dimensions, edges):
+    pos, src, dst = random_layout(n, dimensions, edges, n)
+    expected, found = pos.copy(), pos.copy()
+    k = 1 / n ** (1 / dimensions)
+    t = 0.1
+    for _ in range(30):
+        kernels.spring_step_numpy(expected, src, dst, k, t)
+        kernels.spring_step_numba(found, src, dst, k, t)
+        t -= 0.1 / 31
+    assert np.array_equal(expected, found)
+
+def test_spring_layout_blocks_do_not_change_the_result(monkeypatch):
+    pos, src, dst = random_layout(50, 3, 90, 0)
+    whole = pos.copy()
+    kernels.spring_step_numpy(whole, src, dst, 0.2, 0.1)
+    monkeypatch.setattr(kernels, 'LAYOUT_BLOCK', 7 * 50)
+    blocked = pos.copy()
+    kernels.spring_step_numpy(blocked, src, dst, 0.2, 0.1)
+    assert np.array_equal(whole, blocked)
@@ -0,0 +1,28 @@
+import networkx as nx
+import pytest
+from edo_graphs import generate_transformations
+from refilter import FilteredGraph, parse_filter
+
+def test_parse_filter():
+    assert parse_filter('&32, 23') == (['32', '23'], True)
+    assert parse_filter('|4') == (['4'], False)
+    assert parse_filter(' ') == (False, None)
+
+@pytest.mark.parametrize('inclusions, exclusions, include_and, exclude_and', [
+    (False, False, True, False),
+    (['32', '23'], False, True, False),
+    (['32'], False, False, False),
+    (False, ['33'], True, True),
+])
+def test_refiltered_components_match_regenerated_graph(inclusions, exclusions, include_and, exclude_and):
+    edo, size, intervals = 10, 3, [1, 2]
+    filtered = FilteredGraph(edo, (size, size), intervals, True, False, False)
+    keep = filtered.arc_mask(inclusions, exclusions, include_and, exclude_and)
+    _, arcs = generate_transformations(edo, size, intervals, True, inclusions, exclusions, include_and, exclude_and,
+                                       False, False)
+    G = nx.MultiDiGraph(list(arcs))
+    expected = sorted((frozenset(c) for c in nx.weakly_connected_components(G) if len(c) >= 3), key=len)
+    components = filtered.components(keep)
+    found = sorted((frozenset(filtered.labels[i] for i in nodes) for nodes, _ in components), key=len)
+    assert found == expected
+    assert sum(len(a) for _, a in components) == sum(G.subgraph(c).number_of_edges() for c in expected)
@@ -0,0 +1,17 @@
+import argparse
+import pytest
+from edo_graphs import write_mask_net_file
+from render import component_number, render_file
+
+def test_component_number():
+    assert component_number('3') == 3
+    for text in ('0', '-1'):
+        with pytest.raises(argparse.ArgumentTypeError):
+            component_number(text)
+
+@pytest.mark.parametrize('component', [-1, 5])
+def test_render_file_rejects_missing_components(tmp_path, component):
+    path = str(tmp_path / 'graph.net')
+    write_mask_net_file(path, 12, (3, 3), [1], False)
+    with pytest.raises(ValueError, match='numbered from 1 to'):
+        render_file(path, str(tmp_path / 'output'), component)
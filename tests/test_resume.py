@@ -0,0 +1,68 @@
+import networkx as nx
+import numpy as np
+import pytest
+import display_net
+import layout_cache
+from display_net import apply_spring_layout_nd, prepare_graph, read_previous, resume_starts
+from edo_graphs import generate_transformations
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(layout_cache, 'CACHE_DIR', str(tmp_path / 'cache'))
+
+def graph(intervals):
+    _, arcs = generate_transformations(12, 3, intervals, False, False, False, True, False, False, False)
+    return nx.MultiDiGraph(list(arcs))
+
+def test_positions_file_round_trip(tmp_path):
+    path = str(tmp_path / 'positions.npz')
+    positions = {'0.1': np.array([1.0, 2.0]), '012': np.array([3.0, 4.0])}
+    layout_cache.write_positions(path, positions, {'0.1': 5, '012': 7}, {'0.1': 'a', '012': 'b'})
+    known, done, graphs = layout_cache.read_positions(path)
+    assert {k: list(v) for k, v in known.items()} == {k: list(v) for k, v in positions.items()}
+    assert done == {'0.1': 5, '012': 7} and graphs == {'0.1': 'a', '012': 'b'}
+    with pytest.raises(ValueError):
+        read_previous(path, 3)
+    open(path, 'w').close()
+    with pytest.raises(ValueError):
+        layout_cache.read_positions(path)
+
+def test_resumed_layout_matches_uninterrupted(monkeypatch):
+    monkeypatch.setattr(display_net, 'CHECKPOINT_EVERY', 10)
+    G = graph([1, 2])
+    checkpoints = []
+    whole = apply_spring_layout_nd(G, 50, dimensions=3, checkpoint=lambda pos, done: checkpoints.append((pos, done)))
+    assert [done for _, done in checkpoints] == [10, 20, 30, 40]
+    positions, done = checkpoints[1]
+    resumed = apply_spring_layout_nd(G, 50, dimensions=3, initial=positions, start=done)
+    assert np.allclose(whole, resumed)
+
+def test_prepare_graph_checkpoints_and_resumes(tmp_path, monkeypatch):
+    monkeypatch.setattr(display_net, 'CHECKPOINT_EVERY', 10)
+    path = str(tmp_path / 'positions.npz')
+    G = graph([1, 2])
+    prepare_graph(G, 25, 30, 3, checkpoint=path)
+    known, done, graphs = read_previous(path, 3)
+    assert set(known) == set(G.nodes()) and set(done.values()) == {30}
+
+    subgraphs = display_net.find_components(G)
+    initials, starts = resume_starts(subgraphs, known, done, graphs, 60, 3)
+    assert starts == [30] * len(subgraphs)
+    # resuming for as many iterations leaves the layout as it was
+    again = prepare_graph(G, 25, 30, 3, previous=path, checkpoint=path)
+    first = display_net.normalize_positions(initials[0], 25, 3)
+    assert np.allclose(again[0][1], first)
+    prepare_graph(G, 25, 60, 3, previous=path, checkpoint=path)
+    assert set(read_previous(path, 3)[1].values()) == {60}
+
+def test_changed_graph_is_warm_started(tmp_path):
+    path = str(tmp_path / 'positions.npz')
+    prepare_graph(graph([1]), 25, 20, 3, checkpoint=path)
+    known, done, graphs = read_previous(path, 3)
+    G = graph([1, 2])
+    subgraphs = display_net.find_components(G)
+    initials, starts = resume_starts(subgraphs, known, done, graphs, 20, 3)
+    assert starts[0] is None
+    assert initials[0].shape == (subgraphs[0].number_of_nodes(), 3)
+    shared = [i for i, node in enumerate(subgraphs[0].nodes()) if node in known]
+    assert shared and all(np.array_equal(initials[0][i], known[list(subgraphs[0].nodes())[i]]) for i in shared)
@@ -0,0 +1,44 @@
+import filecmp
+import numpy as np
+import pytest
+from edo_graphs import generate_transformations, read_net_arcs, write_mask_net_file
+from stream import ExternalSort, parse_memory, write_stream_net_file
+
+@pytest.mark.parametrize('edo, chord_sizes, intervals, do_all_keys, options', [
+    (12, (3, 3), [1], True, {}),
+    (12, (3, 3), [1, 2], False, {}),
+    (10, (2, 5), [1, 3], True, {'add_notes': True, 'remove_notes': True}),
+    (9, (3, 6), [2], False, {'flips': True, 'complements': True}),
+    (12, (4, 4), [1], True, {'inclusions': ['32', '23']}),
+    (12, (3, 3), [1, 2], False, {'scales': ['101011010101']}),
+    (8, (3, 3), [1], False, {'exclusions': ['2'], 'truncate': False}),
+])
+def test_stream_writes_the_mask_pipeline_file(tmp_path, edo, chord_sizes, intervals, do_all_keys, options):
+    # a small memory limit, so arcs are spilled to several runs and merged
+    expected = write_mask_net_file(str(tmp_path / 'mask.net'), edo, chord_sizes, intervals, do_all_keys, **options)
+    found = write_stream_net_file(str(tmp_path / 'stream.net'), edo, chord_sizes, intervals, do_all_keys,
+                                  memory=1 << 15, directory=str(tmp_path), **options)
+    assert found == expected
+    assert filecmp.cmp(tmp_path / 'mask.net', tmp_path / 'stream.net', shallow=False)
+
+def test_stream_matches_string_pipeline(tmp_path):
+    labels, arcs = generate_transformations(12, 4, [1, 5], True, False, False, True, False, True, True)
+    write_stream_net_file(str(tmp_path / 'stream.net'), 12, (4, 4), [1, 5], True, simplify_symbol=True,
+                          memory=1 << 15)
+    found_labels, found_arcs, edo = read_net_arcs(str(tmp_path / 'stream.net'))
+    assert edo == 12 and set(found_labels) == labels and set(found_arcs) == arcs
+
+def test_external_sort(tmp_path):
+    rng = np.random.default_rng(0)
+    chunks = [rng.integers(0, 5000, 700) for _ in range(20)]
+    keys = ExternalSort(str(tmp_path), 1 << 10)
+    for chunk in chunks:
+        keys.add(chunk)
+    blocks = list(keys.blocks())
+    assert len(keys.runs) > 1
+    assert (np.concatenate(blocks) == np.unique(np.concatenate(chunks))).all()
+
+def test_parse_memory():
+    assert parse_memory('512M') == 512 << 20
+    assert parse_memory('2g') == 2 << 30
+    assert parse_memory(4096) == 4096
@@ -0,0 +1,64 @@
+import networkx as nx
+import numpy as np
+import pytest
+import kernels
+from display_net import apply_spring_layout_nd
+from edo_graphs import generate_transformations, parse_chord
+from symmetry import find_symmetry
+
+def all_keys_graph(edo, size, intervals):
+    _, arcs = generate_transformations(edo, size, intervals, True, False, False, True, False, False, False)
+    return nx.MultiDiGraph(list(arcs))
+
+def indexed(G):
+    nodes = sorted(G.nodes(), key=str)
+    index = {node: i for i, node in enumerate(nodes)}
+    src = np.array([index[a] for a, b in G.edges()], dtype=np.intp)
+    dst = np.array([index[b] for a, b in G.edges()], dtype=np.intp)
+    return nodes, src, dst
+
+def test_all_keys_graph_has_full_symmetry():
+    edo = 12
+    nodes, src, dst = indexed(all_keys_graph(edo, 3, [1]))
+    symmetry = find_symmetry(nodes, src, dst, edo)
+    assert (symmetry.step, symmetry.order) == (1, edo)
+    masks = np.array([parse_chord(str(node), edo) for node in nodes])
+    # the augmented triads transpose back onto themselves after 4 steps
+    augmented = {0b000100010001 << i for i in range(4)}
+    assert {int(m) for m in masks[symmetry.free]} == augmented
+    members = symmetry.members
+    assert len(np.unique(members)) + len(symmetry.free) == len(nodes)
+    full = (1 << edo) - 1
+    for j in range(edo):
+        assert (masks[members[:, j]] == ((masks[members[:, 0]] << j) | (masks[members[:, 0]] >> (edo - j))) & full).all()
+
+def test_component_without_symmetry():
+    G = nx.MultiDiGraph([('0.0', '1.0'), ('1.0', '2.0'), ('0.0', '2.0')])
+    nodes, src, dst = indexed(G)
+    assert find_symmetry(nodes, src, dst, 12) is None
+    assert find_symmetry(['a', 'b'], src[:1] * 0, dst[:1] * 0 + 1, 12) is None
+
+def test_symmetric_layout_is_equivariant():
+    edo, dimensions = 12, 3
+    G = all_keys_graph(edo, 3, [1])
+    nodes, src, dst = indexed(G)
+    symmetry = find_symmetry(nodes, src, dst, edo)
+    pos = dict(zip(G.nodes(), apply_spring_layout_nd(G, 20, dimensions=dimensions, edo=edo)))
+    layout = np.array([pos[node] for node in nodes])
+    rotations = symmetry.rotations(dimensions)
+    for j in range(edo):
+        assert np.allclose(layout[symmetry.members[:, j]], layout[symmetry.members[:, 0]] @ rotations[j])
+
+@pytest.mark.skipif(kernels.numba is None, reason='numba is not installed')
+def test_spring_layout_rows_backends_agree():
+    rng = np.random.default_rng(3)
+    pos = rng.random((80, 3))
+    src, dst = rng.integers(0, 80, 200).astype(np.intp), rng.integers(0, 80, 200).astype(np.intp)
+    rows = np.sort(rng.choice(80, 30, replace=False))
+    expected, found = pos.copy(), pos.copy()
+    for _ in range(10):
+        kernels.spring_step_numpy(expected, src, dst, 0.2, 0.1, rows)
+        kernels.spring_step_numba(found, src, dst, 0.2, 0.1, rows)
+    assert np.array_equal(expected, found)
+    others = np.setdiff1d(np.arange(80), rows)
+    assert np.array_equal(expected[others], pos[others])